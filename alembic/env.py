@@ -45,6 +45,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
     )
 
     with context.begin_transaction():
@@ -65,10 +66,19 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        # Окрема транзакція на кожну міграцію: autocommit_block() у src.migration_helpers
+        # фіксує лише поточну міграцію, а не всі попередні з того самого запуску
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            transaction_per_migration=True
         )
 
+        # Не чекати на блокування довше за MIGRATION_LOCK_TIMEOUT (наприклад, "5s"): DDL у черзі
+        # на блокування зупиняє всі наступні запити до таблиці
+        lock_timeout = os.getenv("MIGRATION_LOCK_TIMEOUT")
+        if lock_timeout:
+            connection.exec_driver_sql(f"SET lock_timeout = '{lock_timeout}'")
+
         with context.begin_transaction():
             context.run_migrations()
 
@@ -0,0 +1,38 @@
+"""add_book_search_indexes
+
+Revision ID: 3f6a9c2b7e18
+Revises: e1b7d2a94c05
+Create Date: 2026-10-18 18:22:53.640219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.migration_helpers import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6a9c2b7e18'
+down_revision: Union[str, Sequence[str], None] = 'e1b7d2a94c05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_index_concurrently('ix_books_title_fts', 'books',
+                              [sa.text("to_tsvector('simple'::regconfig, title)")], postgresql_using='gin')
+    create_index_concurrently('ix_authors_full_name_fts', 'authors',
+                              [sa.text("to_tsvector('simple'::regconfig, full_name)")], postgresql_using='gin')
+    create_index_concurrently('ix_books_isbn_prefix', 'books', ['isbn'], postgresql_ops={'isbn': 'text_pattern_ops'})
+    create_index_concurrently('ix_book_authors_author_id', 'book_authors', ['author_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_book_authors_author_id', 'book_authors')
+    drop_index_concurrently('ix_books_isbn_prefix', 'books')
+    drop_index_concurrently('ix_authors_full_name_fts', 'authors')
+    drop_index_concurrently('ix_books_title_fts', 'books')
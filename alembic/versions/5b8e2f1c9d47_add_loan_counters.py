@@ -0,0 +1,58 @@
+"""add_loan_counters
+
+Revision ID: 5b8e2f1c9d47
+Revises: 11ce470812c2
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2f1c9d47'
+down_revision: Union[str, Sequence[str], None] = '11ce470812c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('reader_loan_stats',
+    sa.Column('reader_id', sa.Integer(), nullable=False),
+    sa.Column('total_loans', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['reader_id'], ['readers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('reader_id')
+    )
+    op.create_index('ix_reader_loan_stats_total', 'reader_loan_stats', ['total_loans', 'reader_id'], unique=False)
+    op.create_table('genre_loan_stats',
+    sa.Column('genre_id', sa.Integer(), nullable=False),
+    sa.Column('total_loans', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['genre_id'], ['genres.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('genre_id')
+    )
+    op.create_index('ix_genre_loan_stats_total', 'genre_loan_stats', ['total_loans'], unique=False)
+
+    op.execute("""
+        INSERT INTO reader_loan_stats (reader_id, total_loans)
+        SELECT reader_id, COUNT(id) FROM loans GROUP BY reader_id
+    """)
+    op.execute("""
+        INSERT INTO genre_loan_stats (genre_id, total_loans)
+        SELECT b.genre_id, COUNT(l.id)
+        FROM loans l
+        JOIN book_copies bc ON bc.id = l.book_copy_id
+        JOIN books b ON b.id = bc.book_id
+        WHERE b.genre_id IS NOT NULL
+        GROUP BY b.genre_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_genre_loan_stats_total', table_name='genre_loan_stats')
+    op.drop_table('genre_loan_stats')
+    op.drop_index('ix_reader_loan_stats_total', table_name='reader_loan_stats')
+    op.drop_table('reader_loan_stats')
@@ -0,0 +1,42 @@
+"""add_loan_hot_path_indexes
+
+Revision ID: 8c4f1a7e2d93
+Revises: 5b8e2f1c9d47
+Create Date: 2026-10-18 14:05:11.402377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.migration_helpers import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4f1a7e2d93'
+down_revision: Union[str, Sequence[str], None] = '5b8e2f1c9d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Таблиці великі й активно змінюються: будуємо без блокування записів
+    # Замінює видалений у 11ce470812c2 ix_books_genre_id: той самий префікс + порядок сторінок
+    create_index_concurrently('ix_books_genre_year', 'books',
+                              ['genre_id', sa.text('coalesce(publication_year, 0) DESC'), sa.text('id DESC')])
+    create_index_concurrently('ix_book_copies_book_id', 'book_copies', ['book_id'])
+    create_index_concurrently('ix_loans_active_due', 'loans', ['due_date', 'id'],
+                              where=sa.text('returned_at IS NULL'))
+    create_index_concurrently('ix_loans_reader_id', 'loans', ['reader_id'])
+    create_index_concurrently('ix_loans_book_copy_id', 'loans', ['book_copy_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_loans_book_copy_id', 'loans')
+    drop_index_concurrently('ix_loans_reader_id', 'loans')
+    drop_index_concurrently('ix_loans_active_due', 'loans')
+    drop_index_concurrently('ix_book_copies_book_id', 'book_copies')
+    drop_index_concurrently('ix_books_genre_year', 'books')
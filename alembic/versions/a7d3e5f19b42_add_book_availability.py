@@ -0,0 +1,47 @@
+"""add_book_availability
+
+Revision ID: a7d3e5f19b42
+Revises: 3f6a9c2b7e18
+Create Date: 2026-10-18 21:05:12.408117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e5f19b42'
+down_revision: Union[str, Sequence[str], None] = '3f6a9c2b7e18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('book_availability',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('available', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('on_loan', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('lost', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('maintenance', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id')
+    )
+
+    op.execute("""
+        INSERT INTO book_availability (book_id, available, on_loan, lost, maintenance)
+        SELECT book_id,
+               COUNT(*) FILTER (WHERE status = 'available'),
+               COUNT(*) FILTER (WHERE status = 'on_loan'),
+               COUNT(*) FILTER (WHERE status = 'lost'),
+               COUNT(*) FILTER (WHERE status = 'maintenance')
+        FROM book_copies
+        GROUP BY book_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('book_availability')
@@ -0,0 +1,33 @@
+"""add_exact_search_indexes
+
+Revision ID: b4e8c2d61f07
+Revises: a7d3e5f19b42
+Create Date: 2026-10-19 10:14:37.215604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.migration_helpers import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8c2d61f07'
+down_revision: Union[str, Sequence[str], None] = 'a7d3e5f19b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_index_concurrently('ix_books_title_exact', 'books', [sa.text("to_tsvector('simple'::regconfig, title)")])
+    create_index_concurrently('ix_authors_full_name_exact', 'authors',
+                              [sa.text("to_tsvector('simple'::regconfig, full_name)")])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_authors_full_name_exact', 'authors')
+    drop_index_concurrently('ix_books_title_exact', 'books')
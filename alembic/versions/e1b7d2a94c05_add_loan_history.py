@@ -0,0 +1,49 @@
+"""add_loan_history
+
+Revision ID: e1b7d2a94c05
+Revises: 8c4f1a7e2d93
+Create Date: 2026-10-18 16:40:27.915302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b7d2a94c05'
+down_revision: Union[str, Sequence[str], None] = '8c4f1a7e2d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Місячні секції створюються під час архівації (services.archive_closed_loans)
+    op.create_table('loan_history',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('borrowed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=False),
+    sa.Column('returned_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('book_copy_id', sa.Integer(), nullable=False),
+    sa.Column('reader_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['book_copy_id'], ['book_copies.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['reader_id'], ['readers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'borrowed_at'),
+    postgresql_partition_by='RANGE (borrowed_at)'
+    )
+    op.create_index('ix_loan_history_reader_id', 'loan_history', ['reader_id'], unique=False)
+    op.create_index('ix_loan_history_book_copy_id', 'loan_history', ['book_copy_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Повертаємо архів у loans, щоб не втратити історію
+    op.execute("""
+        INSERT INTO loans (id, borrowed_at, due_date, returned_at, book_copy_id, reader_id)
+        SELECT id, borrowed_at, due_date, returned_at, book_copy_id, reader_id FROM loan_history
+    """)
+    op.drop_index('ix_loan_history_book_copy_id', table_name='loan_history')
+    op.drop_index('ix_loan_history_reader_id', table_name='loan_history')
+    op.drop_table('loan_history')
@@ -0,0 +1,27 @@
+import argparse
+from src.database import SessionLocal
+from src.logging_config import configure_logging
+from src.services import archive_closed_loans, LOAN_ARCHIVE_AFTER_DAYS, LOAN_ARCHIVE_BATCH_SIZE
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Перенесення старих закритих видач у секціонований архів loan_history")
+    parser.add_argument("--older-than-days", type=int, default=LOAN_ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=LOAN_ARCHIVE_BATCH_SIZE)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    configure_logging("INFO")
+
+    session = SessionLocal()
+    try:
+        archived = archive_closed_loans(session, args.older_than_days, args.batch_size)
+        print(f"Архівовано видач: {archived}")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Бенчмарки аналітичних запитів і сервісних операцій на синтетичних наборах даних."""
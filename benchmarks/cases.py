@@ -0,0 +1,101 @@
+"""Сценарії бенчмарків: кожен отримує сесію і вибірку ідентифікаторів з поточного набору даних."""
+from dataclasses import dataclass
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src import queries, services
+from src.models import Book, BookCopy, Genre, Loan, Reader, ReaderLoanStats, CopyStatus
+from src.pagination import DEFAULT_PAGE_SIZE
+
+# Скільки копій обробляють масові операції
+BULK_SIZE = 100
+
+
+@dataclass
+class Sample:
+    genre_name: str
+    reader_id: int
+    reader_ids: list
+    busiest_reader_id: int
+    book_id: int
+    book_ids: list
+    available_copy_ids: list
+    loaned_copy_ids: list
+    search_word: str
+    isbn_prefix: str
+
+
+def pick_sample(session: Session) -> Sample:
+    """Обирає стабільні (детерміновані для одного seed) ідентифікатори для сценаріїв."""
+    genre_name = session.query(Genre.name)\
+        .join(Book)\
+        .group_by(Genre.id)\
+        .order_by(func.count(Book.id).desc(), Genre.id)\
+        .limit(1).scalar()
+
+    available_copy_ids = [row.id for row in session.query(BookCopy.id)
+                          .filter(BookCopy.status == CopyStatus.available)
+                          .order_by(BookCopy.id)
+                          .limit(BULK_SIZE + 1)]
+
+    loaned_copy_ids = [row.book_copy_id for row in session.query(Loan.book_copy_id)
+                       .filter(Loan.returned_at == None)
+                       .order_by(Loan.id)
+                       .limit(BULK_SIZE + 1)]
+
+    reader_ids = [row.id for row in session.query(Reader.id).order_by(Reader.id).limit(BULK_SIZE)]
+    book_ids = [row.id for row in session.query(Book.id).order_by(Book.id).limit(BULK_SIZE)]
+
+    busiest_reader_id = session.query(ReaderLoanStats.reader_id)\
+        .order_by(ReaderLoanStats.total_loans.desc(), ReaderLoanStats.reader_id)\
+        .limit(1).scalar()
+
+    # Перше слово назви: у згенерованому наборі воно спільне для ~10% каталогу — найдорожчий пошук
+    first_book = session.query(Book.title, Book.isbn).order_by(Book.id).first()
+
+    if not genre_name or len(available_copy_ids) <= BULK_SIZE or len(loaned_copy_ids) <= BULK_SIZE:
+        raise RuntimeError("Набір даних замалий для бенчмарків: згенеруйте його через generate_data.py")
+
+    return Sample(
+        genre_name=genre_name,
+        reader_id=reader_ids[0],
+        reader_ids=reader_ids,
+        busiest_reader_id=busiest_reader_id,
+        book_id=session.get(BookCopy, available_copy_ids[0]).book_id,
+        book_ids=book_ids,
+        available_copy_ids=available_copy_ids,
+        loaned_copy_ids=loaned_copy_ids,
+        search_word=first_book.title.split()[0],
+        isbn_prefix=first_book.isbn[:-3],
+    )
+
+
+# Назва сценарію -> функція(session, sample). Сервісні операції виконуються у транзакції,
+# яку раннер відкочує після кожного прогону, тому дані між прогонами не змінюються.
+QUERY_CASES = {
+    "queries.get_books_by_genre": lambda s, x: queries.get_books_by_genre(s, x.genre_name, limit=DEFAULT_PAGE_SIZE),
+    "queries.get_overdue_loans": lambda s, x: queries.get_overdue_loans(s, limit=DEFAULT_PAGE_SIZE),
+    "queries.get_top_readers": lambda s, x: queries.get_top_readers(s),
+    "queries.get_genre_popularity": lambda s, x: queries.get_genre_popularity(s),
+    "queries.get_reader_ranks": lambda s, x: queries.get_reader_ranks(s, limit=DEFAULT_PAGE_SIZE),
+    "queries.search_books[word]": lambda s, x: queries.search_books(s, x.search_word, limit=DEFAULT_PAGE_SIZE),
+    "queries.search_books[isbn]": lambda s, x: queries.search_books(s, x.isbn_prefix, limit=DEFAULT_PAGE_SIZE),
+    "queries.get_book_availability": lambda s, x: queries.get_book_availability(s, x.book_ids),
+    "queries.get_reader_summary": lambda s, x: queries.get_reader_summary(s, x.busiest_reader_id),
+}
+
+SERVICE_CASES = {
+    "services.create_loan": lambda s, x: services.create_loan(s, x.available_copy_ids[0], x.reader_id),
+    "services.borrow_any_copy": lambda s, x: services.borrow_any_copy(s, x.book_id, x.reader_id),
+    "services.return_book": lambda s, x: services.return_book(s, x.loaned_copy_ids[0]),
+    "services.bulk_create_loans": lambda s, x: services.bulk_create_loans(s, x.available_copy_ids[1:], x.reader_id),
+    "services.bulk_return_books": lambda s, x: services.bulk_return_books(s, x.loaned_copy_ids[1:]),
+    "services.report_lost_book": lambda s, x: services.report_lost_book(s, x.available_copy_ids[0]),
+    "services.delete_reader": lambda s, x: services.delete_reader(s, x.busiest_reader_id),
+    "services.bulk_delete_readers": lambda s, x: services.bulk_delete_readers(s, x.reader_ids),
+    "services.archive_closed_loans": lambda s, x: services.archive_closed_loans(s),
+    "services.rebuild_loan_stats": lambda s, x: services.rebuild_loan_stats(s),
+}
+
+CASES = {**QUERY_CASES, **SERVICE_CASES}
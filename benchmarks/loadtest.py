@@ -0,0 +1,256 @@
+"""Навантажувальний тест HTTP API.
+
+    python -m benchmarks.loadtest --clients 20 --duration 30 --write-ratio 0.2
+    python -m benchmarks.loadtest --url http://localhost:8000 --clients 50
+
+Без --url запити йдуть у застосунок в тому ж процесі (httpx.ASGITransport), інакше — на
+запущений Uvicorn. Записи (видача/повернення) змінюють БД: кожен клієнт працює зі своїм
+читачем і своїми вільними копіями, а наприкінці повертає все, що видав.
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+from src.database import SessionLocal
+from src.logging_config import configure_logging
+from src.models import Book, BookCopy, Genre, Reader, CopyStatus
+
+# Верхні межі кошиків гістограми, мс
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+READ_ROUTES = ["/analytics/overdue", "/analytics/top-readers", "/analytics/genres", "/analytics/ranks", "/books/genre"]
+
+
+@dataclass
+class ClientState:
+    reader_id: int
+    free_copy_ids: list
+    borrowed_copy_ids: list = field(default_factory=list)
+
+
+@dataclass
+class Workload:
+    genre_names: list
+    clients: list
+
+
+def percentile(sorted_values: list, fraction: float):
+    """Percentile методом найближчого рангу; sorted_values має бути відсортованим."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def histogram(latencies_ms: list):
+    counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+    for value in latencies_ms:
+        counts[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, value)] += 1
+    labels = [f"<={bound}ms" for bound in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}ms"]
+    return dict(zip(labels, counts))
+
+
+def summarize(latencies_ms: list, errors: int, elapsed: float):
+    values = sorted(latencies_ms)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 0.50), 2),
+        "p90_ms": round(percentile(values, 0.90), 2),
+        "p99_ms": round(percentile(values, 0.99), 2),
+        "max_ms": round(values[-1], 2) if values else 0.0,
+        "histogram": histogram(values),
+    }
+
+
+def prepare_workload(clients: int, copies_per_client: int) -> Workload:
+    """Роздає кожному клієнту окремого читача і власні вільні копії, щоб записи не конфліктували."""
+    session = SessionLocal()
+    try:
+        reader_ids = [row.id for row in session.query(Reader.id).order_by(Reader.id).limit(clients)]
+        copy_ids = [row.id for row in session.query(BookCopy.id)
+                    .filter(BookCopy.status == CopyStatus.available)
+                    .order_by(BookCopy.id)
+                    .limit(clients * copies_per_client)]
+        genre_names = [row.name for row in session.query(Genre.name).join(Book).distinct()]
+    finally:
+        session.close()
+
+    if len(reader_ids) < clients or len(copy_ids) < clients * copies_per_client or not genre_names:
+        raise RuntimeError("Недостатньо даних для навантаження: згенеруйте їх через generate_data.py")
+
+    return Workload(
+        genre_names=genre_names,
+        clients=[
+            ClientState(reader_id, copy_ids[i * copies_per_client:(i + 1) * copies_per_client])
+            for i, reader_id in enumerate(reader_ids)
+        ],
+    )
+
+
+class LoadRunner:
+    def __init__(self, http: httpx.AsyncClient, workload: Workload, write_ratio: float, seed: int):
+        self.http = http
+        self.workload = workload
+        self.write_ratio = write_ratio
+        self.random = random.Random(seed)
+        self.latencies = {}
+        self.errors = {}
+
+    async def _request(self, route: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await self.http.request(method, url, **kwargs)
+        self.latencies.setdefault(route, []).append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[route] = self.errors.get(route, 0) + 1
+        return response
+
+    async def _read(self):
+        route = self.random.choice(READ_ROUTES)
+        if route == "/books/genre":
+            await self._request(route, "GET", f"/books/genre/{self.random.choice(self.workload.genre_names)}")
+        else:
+            await self._request(route, "GET", route)
+
+    async def _write(self, state: ClientState):
+        if state.borrowed_copy_ids and (not state.free_copy_ids or self.random.random() < 0.5):
+            await self._return(state, state.borrowed_copy_ids[0])
+            return
+
+        copy_id = state.free_copy_ids.pop()
+        response = await self._request("/loans/borrow", "POST", "/loans/borrow",
+                                       params={"book_copy_id": copy_id, "reader_id": state.reader_id})
+        (state.borrowed_copy_ids if response.status_code == 200 else state.free_copy_ids).append(copy_id)
+
+    async def _return(self, state: ClientState, copy_id: int):
+        response = await self._request("/loans/return", "POST", "/loans/return", params={"book_copy_id": copy_id})
+        if response.status_code == 200:
+            state.borrowed_copy_ids.remove(copy_id)
+            state.free_copy_ids.append(copy_id)
+
+    async def _client(self, state: ClientState, deadline: float):
+        while time.perf_counter() < deadline:
+            if self.random.random() < self.write_ratio:
+                await self._write(state)
+            else:
+                await self._read()
+
+    async def run(self, duration: float):
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*(self._client(state, deadline) for state in self.workload.clients))
+        elapsed = time.perf_counter() - started
+
+        # Повертаємо все, що видали, поза виміряним інтервалом
+        for state in self.workload.clients:
+            for copy_id in list(state.borrowed_copy_ids):
+                await self.http.post("/loans/return", params={"book_copy_id": copy_id})
+        return elapsed
+
+
+def pool_wait_delta(before: dict, after: dict):
+    """Очікування на з'єднання з пулу за час тесту (з /system/pool)."""
+    report = {}
+    for name, stats in after.items():
+        start = before.get(name, {})
+        checkouts = stats.get("checkouts", 0) - start.get("checkouts", 0)
+        wait_ms = stats.get("wait_total_ms", 0.0) - start.get("wait_total_ms", 0.0)
+        report[name] = {
+            "checkouts": checkouts,
+            "timeouts": stats.get("timeouts", 0) - start.get("timeouts", 0),
+            "wait_total_ms": round(wait_ms, 3),
+            "wait_avg_ms": round(wait_ms / checkouts, 3) if checkouts else 0.0,
+            # максимум накопичується з моменту старту процесу
+            "wait_max_ms": stats.get("wait_max_ms", 0.0),
+        }
+    return report
+
+
+async def run_load(args):
+    workload = prepare_workload(args.clients, args.copies_per_client)
+
+    if args.url:
+        transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=args.clients))
+        base_url = args.url
+    else:
+        from src.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://loadtest"
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as http:
+        pool_before = (await http.get("/system/pool")).json()
+        runner = LoadRunner(http, workload, args.write_ratio, args.seed)
+        elapsed = await runner.run(args.duration)
+        pool_after = (await http.get("/system/pool")).json()
+
+    all_latencies = [value for values in runner.latencies.values() for value in values]
+    return {
+        "clients": args.clients,
+        "duration_s": round(elapsed, 2),
+        "write_ratio": args.write_ratio,
+        "target": args.url or "in-process",
+        "total": summarize(all_latencies, sum(runner.errors.values()), elapsed),
+        "routes": {
+            route: summarize(values, runner.errors.get(route, 0), elapsed)
+            for route, values in sorted(runner.latencies.items())
+        },
+        "pool_wait": pool_wait_delta(pool_before, pool_after),
+    }
+
+
+def format_report(report: dict):
+    lines = [f"{report['target']}: {report['clients']} клієнтів, {report['duration_s']} с, "
+             f"частка записів {report['write_ratio']}", ""]
+    header = f"{'route':<24}{'req':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"
+    lines.append(header)
+    for route, stats in [*report["routes"].items(), ("TOTAL", report["total"])]:
+        lines.append(f"{route:<24}{stats['requests']:>8}{stats['errors']:>6}{stats['rps']:>9}"
+                     f"{stats['p50_ms']:>9}{stats['p90_ms']:>9}{stats['p99_ms']:>9}{stats['max_ms']:>9}")
+
+    lines += ["", "Гістограма затримок (усі запити):"]
+    total = report["total"]["requests"] or 1
+    for label, count in report["total"]["histogram"].items():
+        lines.append(f"{label:>10} {count:>8} {'#' * round(50 * count / total)}")
+
+    lines += ["", "Очікування з'єднання з пулу БД:"]
+    for name, stats in report["pool_wait"].items():
+        lines.append(f"{name:>10}: checkouts={stats['checkouts']} timeouts={stats['timeouts']} "
+                     f"avg={stats['wait_avg_ms']}ms total={stats['wait_total_ms']}ms max={stats['wait_max_ms']}ms")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Навантажувальний тест API бібліотеки")
+    parser.add_argument("--url", help="Адреса запущеного сервера; без неї застосунок викликається в процесі")
+    parser.add_argument("--clients", type=int, default=10, help="Кількість одночасних клієнтів")
+    parser.add_argument("--duration", type=float, default=10.0, help="Тривалість, с")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="Частка видач/повернень серед запитів")
+    parser.add_argument("--copies-per-client", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Таймаут HTTP-запиту, с")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, help="Зберегти звіт у JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging()
+
+    report = asyncio.run(run_load(args))
+    print(format_report(report))
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 1 if report["total"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
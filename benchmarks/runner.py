@@ -0,0 +1,218 @@
+"""Запуск бенчмарків і порівняння з базовою лінією.
+
+    python -m benchmarks --preset tiny --preset small            # згенерувати набори і виміряти
+    python -m benchmarks --no-generate --save-baseline           # виміряти поточну БД і зберегти базову лінію
+    python -m benchmarks --preset small --max-slowdown 0.3       # код виходу 1, якщо є регресія
+
+Увага: генерація очищає бібліотечні таблиці, запускайте лише на тестовій БД.
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.cases import CASES, pick_sample
+from src.database import engine, SessionLocal
+from src.datagen import PRESETS, generate_dataset
+from src.logging_config import configure_logging
+
+logger = logging.getLogger("src.benchmarks")
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_RESULTS = BENCH_DIR / "results.json"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+
+# Службові команди транзакції, які додає раннер, а не код, що вимірюється
+_TRANSACTION_CONTROL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+@dataclass
+class Thresholds:
+    max_slowdown: float = 0.25       # допустиме відносне зростання медіани часу
+    min_delta_ms: float = 2.0        # менші абсолютні зміни вважаються шумом
+    max_extra_statements: int = 0    # кількість запитів детермінована, тож будь-яке зростання — регресія
+
+
+@dataclass
+class Regression:
+    dataset: str
+    case: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self):
+        return f"{self.dataset}/{self.case}: {self.metric} {self.baseline} -> {self.current}"
+
+
+@dataclass
+class StatementStats:
+    statements: int = 0
+    rows: int = 0
+
+
+@contextmanager
+def _count_statements(connection):
+    stats = StatementStats()
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(_TRANSACTION_CONTROL):
+            return
+        stats.statements += 1
+        # Для SELECT і RETURNING rowcount psycopg2 дорівнює кількості повернутих рядків
+        if cursor.description is not None and cursor.rowcount > 0:
+            stats.rows += cursor.rowcount
+
+    event.listen(connection, "after_cursor_execute", after_execute)
+    try:
+        yield stats
+    finally:
+        event.remove(connection, "after_cursor_execute", after_execute)
+
+
+def _run_once(fn, sample):
+    """Один прогін у транзакції, яка відкочується: сервісні commit() лише звільняють savepoint."""
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = sessionmaker(bind=connection, join_transaction_mode="create_savepoint")()
+    try:
+        with _count_statements(connection) as stats:
+            started = time.perf_counter()
+            fn(session, sample)
+            elapsed = time.perf_counter() - started
+        return elapsed * 1000, stats
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+def run_cases(sample, repeat: int, cases=None):
+    results = {}
+    for name, fn in (cases or CASES).items():
+        _run_once(fn, sample)  # прогрів кешів планувальника і буферів
+        timings = []
+        for _ in range(repeat):
+            elapsed_ms, stats = _run_once(fn, sample)
+            timings.append(elapsed_ms)
+
+        results[name] = {
+            "median_ms": round(statistics.median(timings), 3),
+            "min_ms": round(min(timings), 3),
+            "max_ms": round(max(timings), 3),
+            "statements": stats.statements,
+            "rows": stats.rows,
+        }
+        logger.info("Сценарій виміряно", extra={"operation": name, **results[name]})
+    return results
+
+
+def run_dataset(repeat: int, cases=None):
+    session = SessionLocal()
+    try:
+        sample = pick_sample(session)
+    finally:
+        session.close()
+    return run_cases(sample, repeat, cases)
+
+
+def compare(current: dict, baseline: dict, thresholds: Thresholds):
+    """Повертає список регресій `current` відносно `baseline` (обидва у форматі results.json).
+
+    Набори даних або сценарії, яких немає в базовій лінії, не порівнюються.
+    """
+    regressions = []
+    for dataset, cases in current.get("datasets", {}).items():
+        baseline_cases = baseline.get("datasets", {}).get(dataset, {})
+        for case, result in cases.items():
+            base = baseline_cases.get(case)
+            if base is None:
+                continue
+
+            if result["statements"] - base["statements"] > thresholds.max_extra_statements:
+                regressions.append(Regression(dataset, case, "statements", base["statements"], result["statements"]))
+
+            delta_ms = result["median_ms"] - base["median_ms"]
+            if delta_ms > thresholds.min_delta_ms and delta_ms > base["median_ms"] * thresholds.max_slowdown:
+                regressions.append(Regression(dataset, case, "median_ms", base["median_ms"], result["median_ms"]))
+    return regressions
+
+
+def parse_args(argv=None):
+    defaults = Thresholds()
+    parser = argparse.ArgumentParser(description="Бенчмарки запитів і сервісів з перевіркою регресій")
+    parser.add_argument("--preset", action="append", choices=sorted(PRESETS),
+                        help="Набір даних (можна вказати кілька); за замовчуванням tiny і small")
+    parser.add_argument("--no-generate", action="store_true",
+                        help="Не генерувати дані, виміряти поточну БД (набір 'current')")
+    parser.add_argument("--repeat", type=int, default=5, help="Кількість вимірюваних прогонів кожного сценарію")
+    parser.add_argument("--case", action="append", help="Виміряти лише сценарії з цим префіксом")
+    parser.add_argument("--output", type=Path, default=DEFAULT_RESULTS)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Записати результати як нову базову лінію")
+    parser.add_argument("--max-slowdown", type=float, default=defaults.max_slowdown)
+    parser.add_argument("--min-delta-ms", type=float, default=defaults.min_delta_ms)
+    parser.add_argument("--max-extra-statements", type=int, default=defaults.max_extra_statements)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging("INFO")
+    # Рядкові логи запитів спотворюють вимірювання
+    logging.getLogger("src.queries").setLevel(logging.WARNING)
+    logging.getLogger("src.services").setLevel(logging.WARNING)
+
+    cases = CASES
+    if args.case:
+        cases = {name: fn for name, fn in CASES.items() if name.startswith(tuple(args.case))}
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "specs": {},
+        "datasets": {},
+    }
+
+    if args.no_generate:
+        results["datasets"]["current"] = run_dataset(args.repeat, cases)
+    else:
+        for preset in args.preset or ["tiny", "small"]:
+            session = SessionLocal()
+            try:
+                generate_dataset(session, PRESETS[preset])
+            finally:
+                session.close()
+            results["datasets"][preset] = run_dataset(args.repeat, cases)
+            results["specs"][preset] = asdict(PRESETS[preset])
+
+    args.output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    logger.info("Результати збережено у %s", args.output)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+        logger.info("Базову лінію оновлено: %s", args.baseline)
+        return 0
+
+    if not args.baseline.exists():
+        logger.warning("Базової лінії %s немає, порівняння пропущено", args.baseline)
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    thresholds = Thresholds(args.max_slowdown, args.min_delta_ms, args.max_extra_statements)
+    regressions = compare(results, baseline, thresholds)
+
+    for regression in regressions:
+        logger.error("Регресія: %s", regression)
+
+    return 1 if regressions else 0
@@ -2,8 +2,10 @@ from src.database import SessionLocal
 from src.services import create_loan, return_book
 from src.queries import get_books_by_genre, get_overdue_loans, get_top_readers, get_genre_popularity, get_reader_ranks
 from src.models import BookCopy, Reader, CopyStatus
+from src.logging_config import configure_logging
 
 def run_demonstration():
+    configure_logging("INFO", human=True)
     session = SessionLocal()
     print("\n" + "="*50)
     print("БІБЛІОТЕЧНА СИСТЕМА: ДЕМОНСТРАЦІЯ")
@@ -24,10 +26,13 @@ def run_demonstration():
         if len(ranks) > 10:
             print("... (і ще інші читачі)")
 
+        print()
         get_genre_popularity(session)
 
+        print()
         get_overdue_loans(session)      
 
+        print()
         get_books_by_genre(session, "Фантастика")
 
         print("\n\nЧАСТИНА 2: ЖИВИЙ ПРОЦЕС (Видача/Повернення)")
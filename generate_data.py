@@ -0,0 +1,31 @@
+import argparse
+from dataclasses import fields, replace
+from src.database import SessionLocal
+from src.datagen import DatasetSpec, PRESETS, generate_dataset
+from src.logging_config import configure_logging
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Генерація синтетичного набору даних для бенчмарків (очищає БД!)")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    for field in fields(DatasetSpec):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=type(field.default), default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    configure_logging("INFO")
+
+    overrides = {f.name: getattr(args, f.name) for f in fields(DatasetSpec) if getattr(args, f.name) is not None}
+    spec = replace(PRESETS[args.preset], **overrides)
+
+    session = SessionLocal()
+    try:
+        generate_dataset(session, spec)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
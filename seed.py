@@ -2,6 +2,7 @@ import random
 from datetime import datetime, timedelta
 from src.database import SessionLocal
 from src.models import Loan, Genre, Author, Book, BookCopy, Reader, CopyStatus
+from src.services import rebuild_loan_stats
 
 FIRST_NAMES = ["Олександр", "Дмитро", "Максим", "Артем", "Іван", "Микола", "Сергій", "Андрій", "Ольга", "Анна", "Юлія", "Марія", "Тетяна", "Олена", "Наталія", "Ірина"]
 LAST_NAMES = ["Коваленко", "Бондаренко", "Ткаченко", "Шевченко", "Кравченко", "Бойко", "Мельник", "Лисенко", "Поліщук", "Гаврилюк"]
@@ -138,6 +139,9 @@ def seed_data():
             session.add(loan)
 
         session.commit()
+
+        print("Перерахунок лічильників видач...")
+        rebuild_loan_stats(session)
         print(f"База успішно наповнена.")
 
     except Exception as e:
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Обмежений кеш з TTL та витісненням LRU для результатів аналітичних запитів."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 30.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._cleared_at = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def generation(self):
+        """Лічильник інвалідацій: передайте його в set(), щоб не записати результат, прочитаний до clear()."""
+        return self._generation
+
+    def since_clear(self):
+        """Секунди з останнього clear() (тобто з останнього запису в БД через цей процес) або None."""
+        cleared_at = self._cleared_at
+        return None if cleared_at is None else self._clock() - cleared_at
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, generation: int = None):
+        with self._lock:
+            # Якщо між читанням з БД і записом у кеш дані змінились — результат уже застарів
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key, factory, store: bool = True):
+        """store=False — обчислити при промаху, але не зберігати (результат може бути застарілим)."""
+        found, value = self.get(key)
+        if found:
+            return value
+
+        generation = self.generation
+        value = factory()
+        if store:
+            self.set(key, value, generation)
+        return value
+
+    async def get_or_set_async(self, key, factory, store: bool = True):
+        found, value = self.get(key)
+        if found:
+            return value
+
+        generation = self.generation
+        value = await factory()
+        if store:
+            self.set(key, value, generation)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+            self._cleared_at = self._clock()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+analytics_cache = TTLCache(
+    maxsize=int(os.getenv("ANALYTICS_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("ANALYTICS_CACHE_TTL", "30")),
+)
@@ -0,0 +1,304 @@
+"""Генератор синтетичних даних для бенчмарків.
+
+Дані генеруються детерміновано (фіксований seed) і завантажуються через COPY
+(psycopg2) або executemany пакетами для інших драйверів, минаючи ORM.
+"""
+import csv
+import io
+import random
+import time
+import logging
+from contextlib import contextmanager
+from bisect import bisect
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.models import Genre, Author, Book, BookCopy, Reader, Loan, CopyStatus, book_authors
+from src.reference import reference_cache
+from src.services import rebuild_loan_stats, rebuild_book_availability
+
+logger = logging.getLogger(__name__)
+
+GENRES = [
+    "Фантастика", "Детектив", "Класика", "Наукова література", "Фентезі", "Жахи",
+    "Поезія", "Історія", "Біографія", "Пригоди", "Філософія", "Дитяча література",
+]
+FIRST_NAMES = ["Олександр", "Дмитро", "Максим", "Артем", "Іван", "Микола", "Сергій", "Андрій",
+               "Ольга", "Анна", "Юлія", "Марія", "Тетяна", "Олена", "Наталія", "Ірина"]
+LAST_NAMES = ["Коваленко", "Бондаренко", "Ткаченко", "Шевченко", "Кравченко", "Бойко",
+              "Мельник", "Лисенко", "Поліщук", "Гаврилюк"]
+TITLE_WORDS = ["Тінь", "Місто", "Зорі", "Вітер", "Дорога", "Таємниця", "Сад", "Море", "Час",
+               "Світло", "Ріка", "Пам'ять", "Ліс", "Вогонь", "Дім", "Острів", "Сон", "Небо"]
+
+# Рядків на одну пачку COPY/executemany
+BATCH_SIZE = 50_000
+
+
+@dataclass
+class DatasetSpec:
+    books: int = 1_000
+    copies_per_book: int = 3
+    readers: int = 1_000
+    loans: int = 20_000
+    years: float = 3.0
+    active_ratio: float = 0.3
+    overdue_ratio: float = 0.2
+    lost_ratio: float = 0.01
+    zipf_s: float = 1.1
+    seed: int = 42
+
+
+PRESETS = {
+    "tiny": DatasetSpec(books=200, readers=200, loans=2_000),
+    "small": DatasetSpec(books=2_000, readers=2_000, loans=50_000),
+    "medium": DatasetSpec(books=20_000, readers=20_000, loans=1_000_000),
+    "large": DatasetSpec(books=200_000, readers=500_000, loans=10_000_000),
+}
+
+
+class _RowStream(io.TextIOBase):
+    """Файлоподібний потік CSV-рядків для copy_expert: рядки генеруються ліниво, пам'ять стала."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._out = io.StringIO()
+        self._writer = csv.writer(self._out, lineterminator="\n")
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        # copy_expert приймає порції довільної довжини, тому віддаємо готовий блок рядків цілком
+        self._out.seek(0)
+        self._out.truncate()
+        for row in islice(self._rows, 2000):
+            self._writer.writerow(["\\N" if v is None else v for v in row])
+        return self._out.getvalue()
+
+
+def _copy_rows(connection, table, columns, rows):
+    dbapi_connection = connection.connection.dbapi_connection
+    if hasattr(dbapi_connection, "cursor") and type(dbapi_connection).__module__.startswith("psycopg2"):
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                _RowStream(rows),
+            )
+        return
+
+    batch = []
+    statement = text(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})")
+    for row in rows:
+        batch.append(dict(zip(columns, row)))
+        if len(batch) >= BATCH_SIZE:
+            connection.execute(statement, batch)
+            batch.clear()
+    if batch:
+        connection.execute(statement, batch)
+
+
+@contextmanager
+def _foreign_keys_deferred(connection, tables):
+    """Знімає FK-обмеження таблиць на час завантаження і відновлює їх після.
+
+    Перевірка FK тригером на кожен рядок у рази повільніша за COPY; повторне додавання
+    обмеження перевіряє всі рядки одним запитом. Усе відбувається в одній транзакції.
+    """
+    constraints = connection.execute(text("""
+        SELECT conrelid::regclass::text AS table_name, conname, pg_get_constraintdef(oid) AS definition
+        FROM pg_constraint
+        WHERE contype = 'f' AND conrelid::regclass::text = ANY(:tables)
+    """), {"tables": list(tables)}).all()
+
+    for c in constraints:
+        connection.execute(text(f'ALTER TABLE {c.table_name} DROP CONSTRAINT "{c.conname}"'))
+
+    yield
+
+    for c in constraints:
+        connection.execute(text(f'ALTER TABLE {c.table_name} ADD CONSTRAINT "{c.conname}" {c.definition}'))
+
+
+class _TimestampFormatter:
+    """Форматує epoch-секунди (UTC) в текст для COPY, кешуючи частини дати й часу."""
+
+    def __init__(self):
+        self._days = {}
+        self._times = {}
+
+    def date(self, ts: int):
+        day = ts // 86400
+        text_day = self._days.get(day)
+        if text_day is None:
+            text_day = self._days[day] = datetime.fromtimestamp(day * 86400, timezone.utc).strftime("%Y-%m-%d")
+        return text_day
+
+    def timestamp(self, ts: int):
+        seconds = ts % 86400
+        text_time = self._times.get(seconds)
+        if text_time is None:
+            text_time = self._times[seconds] = f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}+00"
+        return f"{self.date(ts)} {text_time}"
+
+
+class _Generator:
+    def __init__(self, spec: DatasetSpec):
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.copies_of_book = []
+        self.copy_book = []
+        self.active_copies = {}
+        self.lost_copies = set()
+
+    def genres(self):
+        for genre_id, name in enumerate(GENRES, 1):
+            yield genre_id, name
+
+    def authors(self):
+        rng = self.rng
+        for author_id in range(1, max(1, self.spec.books // 3) + 1):
+            yield author_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {author_id}"
+
+    def books(self):
+        rng = self.rng
+        for book_id in range(1, self.spec.books + 1):
+            title = f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS).lower()} {book_id}"
+            yield book_id, title, f"BENCH-{book_id:010d}", rng.randint(1850, 2025), rng.randint(1, len(GENRES))
+
+    def book_authors(self):
+        rng = self.rng
+        authors_count = max(1, self.spec.books // 3)
+        for book_id in range(1, self.spec.books + 1):
+            for author_id in set(rng.randint(1, authors_count) for _ in range(rng.choice((1, 1, 1, 2)))):
+                yield book_id, author_id
+
+    def plan_copies(self):
+        """Розподіляє копії по книгах і заздалегідь обирає активні видачі та втрачені копії."""
+        rng = self.rng
+        spec = self.spec
+        copy_id = 0
+        for book_id in range(1, spec.books + 1):
+            count = rng.randint(1, 2 * spec.copies_per_book - 1)
+            ids = list(range(copy_id + 1, copy_id + count + 1))
+            self.copies_of_book.append(ids)
+            self.copy_book.extend([book_id] * count)
+            copy_id += count
+
+        total = copy_id
+        active = rng.sample(range(1, total + 1), int(total * spec.active_ratio))
+        for copy in active:
+            self.active_copies[copy] = rng.random() < spec.overdue_ratio
+        free = [c for c in range(1, total + 1) if c not in self.active_copies]
+        self.lost_copies = set(rng.sample(free, int(total * spec.lost_ratio)))
+
+    def copies(self):
+        for copy_id, book_id in enumerate(self.copy_book, 1):
+            if copy_id in self.active_copies:
+                status = CopyStatus.on_loan.value
+            elif copy_id in self.lost_copies:
+                status = CopyStatus.lost.value
+            else:
+                status = CopyStatus.available.value
+            yield copy_id, f"BENCH-INV-{copy_id:010d}", status, book_id
+
+    def readers(self):
+        rng = self.rng
+        for reader_id in range(1, self.spec.readers + 1):
+            yield reader_id, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), f"reader{reader_id}@bench.example"
+
+    def loans(self):
+        """Історія (повернені видачі) з Zipf-популярністю книг, потім активні видачі."""
+        rng = self.rng
+        spec = self.spec
+        weights = [1.0 / (rank ** spec.zipf_s) for rank in range(1, spec.books + 1)]
+        cum_weights = list(accumulate(weights))
+        total_weight = cum_weights[-1]
+        # Популярність не повинна корелювати з id книги
+        popular_order = list(range(1, spec.books + 1))
+        rng.shuffle(popular_order)
+
+        # Гаряча петля для мільйонів рядків: лише rng.random(), арифметика над epoch-секундами
+        # і кешоване текстове форматування дат (datetime/str на кожен рядок коштують більше за генерацію)
+        rand = rng.random
+        stamp = _TimestampFormatter()
+        copies_of_book = self.copies_of_book
+        readers = spec.readers
+        now_ts = int(self.now.timestamp())
+        min_age = 30 * 86400
+        span = max(0, int(spec.years * 365 * 86400) - min_age)
+        latest_return = now_ts - 86400
+        loan_id = 0
+
+        for _ in range(spec.loans):
+            loan_id += 1
+            book_id = popular_order[bisect(cum_weights, rand() * total_weight)]
+            copies = copies_of_book[book_id - 1]
+            borrowed_ts = now_ts - min_age - int(rand() * span)
+            returned_ts = min(borrowed_ts + int(86400 * (1 + rand() * 30)), latest_return)
+            yield (loan_id, stamp.timestamp(borrowed_ts), stamp.date(borrowed_ts + 14 * 86400), stamp.timestamp(returned_ts),
+                   copies[int(rand() * len(copies))], 1 + int(rand() * readers))
+
+        for copy_id, overdue in self.active_copies.items():
+            loan_id += 1
+            days_ago = rng.randint(15, 60) if overdue else rng.randint(0, 13)
+            borrowed = self.now - timedelta(days=days_ago, seconds=rng.randint(0, 86400))
+            due = (borrowed + timedelta(days=14)).date()
+            yield loan_id, borrowed, due, None, copy_id, rng.randint(1, spec.readers)
+
+
+def generate_dataset(session: Session, spec: DatasetSpec):
+    """Очищає бібліотечні таблиці і заповнює їх синтетичним набором даних за специфікацією."""
+    started = time.perf_counter()
+    logger.info("Генерація набору даних", extra={"operation": "generate_dataset", **asdict(spec)})
+
+    generator = _Generator(spec)
+    connection = session.connection()
+
+    connection.execute(text(
+        "TRUNCATE loans, book_copies, book_authors, books, authors, genres, readers RESTART IDENTITY CASCADE"
+    ))
+
+    steps = [
+        (Genre.__tablename__, ["id", "name"], generator.genres),
+        (Author.__tablename__, ["id", "full_name"], generator.authors),
+        (Book.__tablename__, ["id", "title", "isbn", "publication_year", "genre_id"], generator.books),
+        (book_authors.name, ["book_id", "author_id"], generator.book_authors),
+        (BookCopy.__tablename__, ["id", "inventory_number", "status", "book_id"], generator.copies),
+        (Reader.__tablename__, ["id", "first_name", "last_name", "email"], generator.readers),
+        (Loan.__tablename__, ["id", "borrowed_at", "due_date", "returned_at", "book_copy_id", "reader_id"], generator.loans),
+    ]
+
+    generator.plan_copies()
+    with _foreign_keys_deferred(connection, [table for table, _, _ in steps]):
+        for table, columns, rows in steps:
+            step_started = time.perf_counter()
+            _copy_rows(connection, table, columns, rows())
+            logger.info("Таблицю %s заповнено", table, extra={
+                "operation": "generate_dataset",
+                "table": table,
+                "duration_ms": round((time.perf_counter() - step_started) * 1000, 1),
+            })
+
+    for table in ("genres", "authors", "books", "book_copies", "readers", "loans"):
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+        ))
+
+    rebuild_loan_stats(session)
+    rebuild_book_availability(session)
+
+    connection = session.connection()
+    connection.execute(text("ANALYZE"))
+    session.commit()
+    # COPY оминає ORM-події, тож довідники в цьому процесі скидаємо явно
+    reference_cache.invalidate()
+
+    logger.info("Набір даних згенеровано", extra={
+        "operation": "generate_dataset",
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    })
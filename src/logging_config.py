@@ -0,0 +1,60 @@
+import functools
+import logging
+import os
+import sys
+import time
+
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class StructuredFormatter(logging.Formatter):
+    """Дописує до повідомлення поля з `extra={...}` у вигляді key=value (operation, ids, duration_ms)."""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = {k: v for k, v in vars(record).items() if k not in _RECORD_FIELDS}
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+def configure_logging(level: str = None, human: bool = False):
+    """Налаштовує логер пакета `src`.
+
+    human=True — лише текст повідомлень у stdout (консольна демонстрація),
+    інакше — рядки з рівнем, логером і структурованими полями у stderr.
+    Рівень за замовчуванням береться з LOG_LEVEL (WARNING).
+    """
+    level = (level or os.getenv("LOG_LEVEL", "WARNING")).upper()
+
+    if human:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(StructuredFormatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+
+    logger = logging.getLogger("src")
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def timed(logger: logging.Logger):
+    """Декоратор: на рівні DEBUG логує тривалість виклику; на вищих рівнях не вимірює нічого."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not logger.isEnabledFor(logging.DEBUG):
+                return fn(*args, **kwargs)
+
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                logger.debug("Операцію завершено", extra={
+                    "operation": fn.__name__,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                })
+        return wrapper
+    return decorator
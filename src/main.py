@@ -1,13 +1,122 @@
-from fastapi import FastAPI, Depends, HTTPException
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import List, Optional, Union
+from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from src.database import SessionLocal, engine, Base
-from src import models, queries, services
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database import (
+    SessionLocal, AsyncSessionLocal, DB_ASYNC, DB_CREATE_ALL, DB_SCHEMA_CHECK, engine, async_engine, pool_status, Base,
+    check_schema_revision, read_sessionmaker, replica_router, replica_engine, async_replica_engine,
+    AsyncReplicaSessionLocal
+)
+from src import models, queries, services, export
+from src.cache import analytics_cache
+from src.schemas import (
+    BulkBorrowRequest, BulkReturnRequest, BookPage, BookSearchPage, OverduePage, TopReader, GenrePopularity,
+    ReaderRankPage, CacheStats, PoolStats, BorrowResponse, BorrowAnyCopyResponse, ReturnResponse,
+    BulkBorrowResponse, BulkReturnResponse, DeleteReaderResponse, BulkDeleteReadersRequest, BulkDeleteReadersResponse,
+    ReplicaStatus, BookAvailabilityItem, MAX_BULK_ITEMS, ReaderSummary
+)
+from src.logging_config import configure_logging
+from src.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, make_page, cursor_int, cursor_number, cursor_date
+)
 
-Base.metadata.create_all(bind=engine)
+configure_logging()
 
-app = FastAPI(title="Бібліотечна API")
+logger = logging.getLogger(__name__)
 
-def get_db():
+
+async def _check_schema():
+    try:
+        await run_in_threadpool(check_schema_revision, engine)
+    except Exception:
+        logger.warning("Не вдалося перевірити ревізію схеми БД", exc_info=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Старт не відкриває з'єднань з БД: пули підключаються під час першого запиту.
+
+    DDL під час старту виконується лише з DB_CREATE_ALL=true; у звичайному режимі схему
+    створює `alembic upgrade head`, а ревізія перевіряється у фоні.
+    """
+    schema_check = None
+    if DB_CREATE_ALL:
+        await run_in_threadpool(Base.metadata.create_all, bind=engine)
+    elif DB_SCHEMA_CHECK:
+        schema_check = asyncio.create_task(_check_schema())
+
+    yield
+
+    if schema_check is not None:
+        schema_check.cancel()
+    engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    if replica_engine is not None:
+        replica_engine.dispose()
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
+
+
+app = FastAPI(title="Бібліотечна API", lifespan=lifespan)
+
+DbSession = Union[Session, AsyncSession]
+
+if DB_ASYNC:
+    async def get_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+else:
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+# Аналітика читає з репліки (REPLICA_DATABASE_URL), поки та не відстає більше за REPLICA_MAX_LAG;
+# без репліки або при відставанні — з primary. Сесія репліки позначається в info["replica"]
+if DB_ASYNC:
+    async def get_read_db():
+        factory = AsyncSessionLocal
+        if replica_router is not None and await run_in_threadpool(replica_router.use_replica):
+            factory = AsyncReplicaSessionLocal
+        async with factory(info={"replica": factory is AsyncReplicaSessionLocal}) as db:
+            yield db
+else:
+    def get_read_db():
+        factory = read_sessionmaker()
+        db = factory(info={"replica": factory is not SessionLocal})
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+def analytics_cacheable(db: DbSession) -> bool:
+    """Чи можна кешувати результат аналітики, прочитаний сесією db.
+
+    Записи скидають кеш; результат з репліки, яка ще могла не відтворити останній запис, віддається,
+    але не кешується — інакше кеш тримав би його без цього запису весь ANALYTICS_CACHE_TTL.
+    """
+    if not db.info.get("replica"):
+        return True
+    return replica_router.caught_up_with(analytics_cache.since_clear())
+
+
+def get_export_db():
+    """Синхронна сесія для потокового експорту (в обох режимах DB_ASYNC).
+
+    Серверний курсор читається частинами в пулі потоків, поки StreamingResponse віддає відповідь;
+    сесія закривається вже після відправлення останнього фрагмента: FastAPI з версії 0.118
+    виконує код після yield у залежностях лише після відповіді (requirements.txt вимагає новішу).
+    """
     db = SessionLocal()
     try:
         yield db
@@ -15,56 +124,219 @@ def get_db():
         db.close()
 
 
-@app.get("/books/genre/{genre_name}", tags=["Books"])
-def get_books_by_genre_endpoint(genre_name: str, db: Session = Depends(get_db)):
-    books = queries.get_books_by_genre(db, genre_name)
-    if not books:
+async def run_db(db: DbSession, fn, *args, **kwargs):
+    """Викликає функцію з queries/services, не блокуючи event loop.
+
+    В асинхронному режимі ORM-код виконується через AsyncSession.run_sync поверх asyncpg,
+    у синхронному — у пулі потоків, як це робить FastAPI для звичайних def-маршрутів.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+def page_params(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), after: Optional[str] = None):
+    return {"limit": limit, "after": after}
+
+
+def parse_cursor(after: Optional[str], *types):
+    """Курсор сторінки з очікуваними типами ключа сортування маршруту; некоректний — 400."""
+    if after is None:
+        return None
+    try:
+        return decode_cursor(after, *types)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/books/genre/{genre_name}", tags=["Books"], response_model=BookPage)
+async def get_books_by_genre_endpoint(genre_name: str, page: dict = Depends(page_params), db: DbSession = Depends(get_db)):
+    after = parse_cursor(page["after"], cursor_int, cursor_int)
+    books = await run_db(db, queries.get_books_by_genre, genre_name, limit=page["limit"], after=after)
+    if not books and after is None:
         raise HTTPException(status_code=404, detail="Книг цього жанру не знайдено")
-    return books
+    return make_page(books, page["limit"], queries.book_sort_key)
+
+@app.get("/books/search", tags=["Books"], response_model=BookSearchPage)
+async def search_books_endpoint(q: str = Query(..., min_length=2, max_length=200), page: dict = Depends(page_params),
+                                db: DbSession = Depends(get_db)):
+    after = parse_cursor(page["after"], cursor_number, cursor_int)
+    # Зайвий рядок показує, чи є наступна сторінка: остання сторінка не має курсора і несе truncated
+    books, truncated = await run_db(db, queries.search_books, q, limit=page["limit"] + 1, after=after)
+    result = make_page(books[:page["limit"]], page["limit"], queries.search_sort_key,
+                       has_more=len(books) > page["limit"])
+    return {**result, "truncated": truncated}
+
+@app.get("/books/availability", tags=["Books"], response_model=List[BookAvailabilityItem])
+async def get_books_availability_endpoint(book_ids: List[int] = Query(..., min_length=1, max_length=MAX_BULK_ITEMS),
+                                          db: DbSession = Depends(get_db)):
+    return await run_db(db, queries.get_book_availability, list(dict.fromkeys(book_ids)))
+
+@app.get("/books/{book_id}/availability", tags=["Books"], response_model=BookAvailabilityItem)
+async def get_book_availability_endpoint(book_id: int, db: DbSession = Depends(get_db)):
+    rows = await run_db(db, queries.get_book_availability, [book_id])
+    if not rows:
+        raise HTTPException(status_code=404, detail="Книгу не знайдено")
+    return rows[0]
+
+
+@app.get("/readers/{reader_id}/summary", tags=["Readers"], response_model=ReaderSummary)
+async def get_reader_summary_endpoint(reader_id: int, db: DbSession = Depends(get_db)):
+    summary = await run_db(db, queries.get_reader_summary, reader_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Читача не знайдено")
+    return summary
+
 
-@app.get("/analytics/overdue", tags=["Analytics"])
-def get_overdue_endpoint(db: Session = Depends(get_db)):
-    return queries.get_overdue_loans(db)
+@app.get("/analytics/overdue", tags=["Analytics"], response_model=OverduePage)
+async def get_overdue_endpoint(page: dict = Depends(page_params), db: DbSession = Depends(get_read_db)):
+    after = parse_cursor(page["after"], cursor_date, cursor_int)
 
-@app.get("/analytics/top-readers", tags=["Analytics"])
-def get_top_readers_endpoint(db: Session = Depends(get_db)):
-    return queries.get_top_readers(db)
+    async def load():
+        loans = await run_db(db, queries.get_overdue_loans, limit=page["limit"], after=after)
+        return make_page(loans, page["limit"], queries.overdue_sort_key)
 
-@app.get("/analytics/genres", tags=["Analytics"])
-def get_genre_stats_endpoint(db: Session = Depends(get_db)):
-    return queries.get_genre_popularity(db)
+    return await analytics_cache.get_or_set_async(("overdue", date.today(), page["limit"], page["after"]), load,
+                                                  store=analytics_cacheable(db))
 
-@app.get("/analytics/ranks", tags=["Analytics"])
-def get_reader_ranks_endpoint(db: Session = Depends(get_db)):
-    return queries.get_reader_ranks(db)
+@app.get("/analytics/top-readers", tags=["Analytics"], response_model=List[TopReader])
+async def get_top_readers_endpoint(db: DbSession = Depends(get_read_db)):
+    return await analytics_cache.get_or_set_async(("top-readers",), lambda: run_db(db, queries.get_top_readers),
+                                                  store=analytics_cacheable(db))
 
+@app.get("/analytics/genres", tags=["Analytics"], response_model=List[GenrePopularity])
+async def get_genre_stats_endpoint(db: DbSession = Depends(get_read_db)):
+    return await analytics_cache.get_or_set_async(("genres",), lambda: run_db(db, queries.get_genre_popularity),
+                                                  store=analytics_cacheable(db))
 
-@app.post("/loans/borrow", tags=["Actions"])
-def borrow_book_endpoint(book_copy_id: int, reader_id: int, days: int = 14, db: Session = Depends(get_db)):
+@app.get("/analytics/ranks", tags=["Analytics"], response_model=ReaderRankPage)
+async def get_reader_ranks_endpoint(page: dict = Depends(page_params), db: DbSession = Depends(get_read_db)):
+    after = parse_cursor(page["after"], cursor_int, cursor_int)
+
+    async def load():
+        ranks = await run_db(db, queries.get_reader_ranks, limit=page["limit"], after=after)
+        return make_page(ranks, page["limit"], queries.rank_sort_key)
+
+    return await analytics_cache.get_or_set_async(("ranks", page["limit"], page["after"]), load,
+                                                  store=analytics_cacheable(db))
+
+@app.get("/analytics/cache", tags=["Analytics"], response_model=CacheStats)
+async def get_analytics_cache_stats_endpoint():
+    return analytics_cache.stats()
+
+
+@app.get("/export/loans", tags=["Export"], response_class=StreamingResponse)
+async def export_loans_endpoint(format: export.ExportFormat = "csv", since: Optional[date] = None,
+                                db: Session = Depends(get_export_db)):
+    query = export.loan_history_query(db, since)
+    return StreamingResponse(
+        export.stream_export(db, query, format, "export_loans"),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="loans.{format}"'},
+    )
+
+@app.get("/export/overdue", tags=["Export"], response_class=StreamingResponse)
+async def export_overdue_endpoint(format: export.ExportFormat = "csv", db: Session = Depends(get_export_db)):
+    query = queries.overdue_loans_query(db, date.today())
+    return StreamingResponse(
+        export.stream_export(db, query, format, "export_overdue"),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="overdue.{format}"'},
+    )
+
+
+@app.get("/system/pool", tags=["System"], response_model=PoolStats, response_model_exclude_none=True)
+async def get_pool_stats_endpoint():
+    stats = {"sync": pool_status(engine)}
+    if async_engine is not None:
+        stats["async"] = pool_status(async_engine.sync_engine)
+    if replica_engine is not None:
+        stats["replica"] = pool_status(replica_engine)
+    if async_replica_engine is not None:
+        stats["replica_async"] = pool_status(async_replica_engine.sync_engine)
+    return stats
+
+
+@app.get("/system/replica", tags=["System"], response_model=ReplicaStatus, response_model_exclude_none=True)
+async def get_replica_status_endpoint():
+    if replica_router is None:
+        return {"configured": False}
+    await run_in_threadpool(replica_router.refresh)
+    return {"configured": True, **replica_router.status()}
+
+
+@app.post("/loans/borrow", tags=["Actions"], response_model=BorrowResponse)
+async def borrow_book_endpoint(book_copy_id: int, reader_id: int, days: int = 14, db: DbSession = Depends(get_db)):
     try:
-        new_loan = services.create_loan(db, book_copy_id, reader_id, days)
+        new_loan = await run_db(db, services.create_loan, book_copy_id, reader_id, days)
         return {"message": "Книгу видано успішно", "loan_id": new_loan.id, "due_date": new_loan.due_date}
+    except services.CopyUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/loans/return", tags=["Actions"])
-def return_book_endpoint(book_copy_id: int, db: Session = Depends(get_db)):
+@app.post("/books/{book_id}/borrow", tags=["Actions"], response_model=BorrowAnyCopyResponse)
+async def borrow_any_copy_endpoint(book_id: int, reader_id: int, days: int = 14, db: DbSession = Depends(get_db)):
     try:
-        loan = services.return_book(db, book_copy_id)
+        new_loan = await run_db(db, services.borrow_any_copy, book_id, reader_id, days)
+        return {
+            "message": "Книгу видано успішно",
+            "loan_id": new_loan.id,
+            "book_copy_id": new_loan.book_copy_id,
+            "due_date": new_loan.due_date
+        }
+    except services.CopyUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/loans/return", tags=["Actions"], response_model=ReturnResponse)
+async def return_book_endpoint(book_copy_id: int, db: DbSession = Depends(get_db)):
+    try:
+        loan = await run_db(db, services.return_book, book_copy_id)
         return {"message": "Книгу повернуто", "returned_at": loan.returned_at}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/readers/{reader_id}", tags=["Actions"])
-def delete_reader_endpoint(reader_id: int, db: Session = Depends(get_db)):
+@app.post("/loans/borrow/bulk", tags=["Actions"], response_model=BulkBorrowResponse, response_model_exclude_none=True)
+async def bulk_borrow_endpoint(request: BulkBorrowRequest, db: DbSession = Depends(get_db)):
+    try:
+        results = await run_db(db, services.bulk_create_loans, request.book_copy_ids, request.reader_id, request.days)
+        return {"issued": sum(r["ok"] for r in results), "results": results}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/loans/return/bulk", tags=["Actions"], response_model=BulkReturnResponse, response_model_exclude_none=True)
+async def bulk_return_endpoint(request: BulkReturnRequest, db: DbSession = Depends(get_db)):
+    try:
+        results = await run_db(db, services.bulk_return_books, request.book_copy_ids)
+        return {"returned": sum(r["ok"] for r in results), "results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/readers/{reader_id}", tags=["Actions"], response_model=DeleteReaderResponse)
+async def delete_reader_endpoint(reader_id: int, db: DbSession = Depends(get_db)):
     try:
-        result = services.delete_reader(db, reader_id)
+        result = await run_db(db, services.delete_reader, reader_id)
         return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/readers/delete/bulk", tags=["Actions"], response_model=BulkDeleteReadersResponse,
+          response_model_exclude_none=True)
+async def bulk_delete_readers_endpoint(request: BulkDeleteReadersRequest, db: DbSession = Depends(get_db)):
+    try:
+        results = await run_db(db, services.bulk_delete_readers, request.reader_ids)
+        return {"deleted": sum(r["ok"] for r in results), "results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,104 @@
+"""Побудова і видалення індексів без блокування таблиць для міграцій Alembic.
+
+`CREATE INDEX CONCURRENTLY` не можна виконувати в транзакції, тому операції обгорнуто в
+`autocommit_block()`: попередні зміни міграції фіксуються, індекс будується в режимі autocommit.
+Під час побудови окреме з'єднання періодично логує прогрес з `pg_stat_progress_create_index`.
+
+    from src.migration_helpers import create_index_concurrently, drop_index_concurrently
+
+    def upgrade():
+        create_index_concurrently('ix_loans_reader_id', 'loans', ['reader_id'])
+"""
+import logging
+import os
+import threading
+
+from alembic import op
+from sqlalchemy import create_engine, text, pool
+
+logger = logging.getLogger(__name__)
+
+# Як часто логувати прогрес побудови, с (0 вимикає)
+PROGRESS_INTERVAL = float(os.getenv("MIGRATION_PROGRESS_INTERVAL", "10"))
+
+
+def _invalid_index_exists(connection, name: str) -> bool:
+    # Перервана побудова CONCURRENTLY залишає невалідний індекс, який треба видалити перед повтором
+    return bool(connection.execute(text("""
+        SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name AND NOT i.indisvalid
+    """), {"name": name}).scalar())
+
+
+class _ProgressReporter(threading.Thread):
+    """Опитує pg_stat_progress_create_index для бекенду міграції в окремому з'єднанні."""
+
+    def __init__(self, url, backend_pid: int, index_name: str, interval: float):
+        super().__init__(daemon=True)
+        self.engine = create_engine(url, poolclass=pool.NullPool)
+        self.backend_pid = backend_pid
+        self.index_name = index_name
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            with self.engine.connect() as connection:
+                while not self.stopped.wait(self.interval):
+                    row = connection.execute(text("""
+                        SELECT phase, blocks_done, blocks_total, tuples_done, tuples_total
+                        FROM pg_stat_progress_create_index WHERE pid = :pid
+                    """), {"pid": self.backend_pid}).first()
+                    connection.rollback()
+                    if row is not None:
+                        logger.info("%s: %s, блоки %s/%s, рядки %s/%s", self.index_name, row.phase,
+                                    row.blocks_done, row.blocks_total, row.tuples_done, row.tuples_total)
+        except Exception:
+            logger.warning("Не вдалося отримати прогрес побудови %s", self.index_name, exc_info=True)
+        finally:
+            self.engine.dispose()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def create_index_concurrently(name: str, table: str, columns: list, unique: bool = False,
+                              where=None, progress_interval: float = PROGRESS_INTERVAL, **kw):
+    """Будує індекс без блокування записів у таблицю (CREATE INDEX CONCURRENTLY IF NOT EXISTS).
+
+    Додаткові аргументи (postgresql_using, postgresql_ops тощо) передаються в op.create_index.
+    """
+    context = op.get_context()
+
+    with context.autocommit_block():
+        if context.as_sql:
+            op.create_index(name, table, columns, unique=unique, postgresql_where=where,
+                            postgresql_concurrently=True, if_not_exists=True, **kw)
+            return
+
+        connection = op.get_bind()
+        if _invalid_index_exists(connection, name):
+            logger.warning("Знайдено невалідний індекс %s після перерваної побудови, видаляємо", name)
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+        reporter = None
+        if progress_interval:
+            backend_pid = connection.execute(text("SELECT pg_backend_pid()")).scalar()
+            reporter = _ProgressReporter(connection.engine.url, backend_pid, name, progress_interval)
+            reporter.start()
+
+        logger.info("Побудова індексу %s на %s (CONCURRENTLY)", name, table)
+        try:
+            op.create_index(name, table, columns, unique=unique, postgresql_where=where,
+                            postgresql_concurrently=True, if_not_exists=True, **kw)
+        finally:
+            if reporter is not None:
+                reporter.stop()
+        logger.info("Індекс %s побудовано", name)
+
+
+def drop_index_concurrently(name: str, table: str):
+    """Видаляє індекс без блокування таблиці (DROP INDEX CONCURRENTLY IF EXISTS)."""
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -1,7 +1,7 @@
 import enum
 from sqlalchemy import (
     Column, Integer, String, Date, ForeignKey, DateTime, Text,
-    Enum as SQLEnum, CheckConstraint, Index, func, Table
+    Enum as SQLEnum, CheckConstraint, Index, func, Table, literal_column
 )
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -18,9 +18,19 @@ book_authors = Table(
     'book_authors',
     Base.metadata,
     Column('book_id', Integer, ForeignKey('books.id', ondelete='CASCADE'), primary_key=True),
-    Column('author_id', Integer, ForeignKey('authors.id', ondelete='CASCADE'), primary_key=True)
+    Column('author_id', Integer, ForeignKey('authors.id', ondelete='CASCADE'), primary_key=True),
+    # PK (book_id, author_id) не допомагає шукати книги автора
+    Index('ix_book_authors_author_id', 'author_id')
 )
 
+def search_vector(column):
+    """tsvector для повнотекстового пошуку; той самий вираз використовують індекси і запити.
+
+    Конфігурація 'simple' без стемінгу підходить для назв будь-якою мовою.
+    """
+    return func.to_tsvector(literal_column("'simple'::regconfig"), column)
+
+
 class Genre(Base):
     __tablename__ = 'genres'
     id = Column(Integer, primary_key=True)
@@ -35,6 +45,12 @@ class Author(Base):
     
     books = relationship("Book", secondary=book_authors, back_populates="authors", passive_deletes=True)
 
+    __table_args__ = (
+        Index('ix_authors_full_name_fts', search_vector(full_name), postgresql_using='gin'),
+        # Точний збіг імені (ті самі слова в тому ж порядку) для пошуку — btree за tsvector
+        Index('ix_authors_full_name_exact', search_vector(full_name)),
+    )
+
 class Book(Base):
     __tablename__ = 'books'
     id = Column(Integer, primary_key=True)
@@ -52,6 +68,12 @@ class Book(Base):
     __table_args__ = (
         CheckConstraint("publication_year IS NULL OR publication_year > 0", name="ck_book_pub_year_positive"),
         Index('ix_books_title', 'title'),
+        # Фільтр за жанром + порядок сторінок get_books_by_genre (рік DESC, id DESC)
+        Index('ix_books_genre_year', 'genre_id', func.coalesce(publication_year, 0).desc(), id.desc()),
+        # Пошук /books/search: слова назви і префікс ISBN
+        Index('ix_books_title_fts', search_vector(title), postgresql_using='gin'),
+        Index('ix_books_title_exact', search_vector(title)),
+        Index('ix_books_isbn_prefix', 'isbn', postgresql_ops={'isbn': 'text_pattern_ops'}),
     )
 
 class BookCopy(Base):
@@ -65,6 +87,8 @@ class BookCopy(Base):
     book = relationship("Book", back_populates="copies")
     loans = relationship("Loan", back_populates="copy", cascade="all, delete-orphan")
 
+    __table_args__ = (Index('ix_book_copies_book_id', 'book_id'),)
+
 class Reader(Base):
     __tablename__ = 'readers'
     id = Column(Integer, primary_key=True)
@@ -73,7 +97,8 @@ class Reader(Base):
     email = Column(String, unique=True, nullable=False)
     phone_number = Column(String, nullable=True)
     
-    loans = relationship("Loan", back_populates="reader", cascade="all, delete-orphan")
+    # Видачі видаляє ON DELETE CASCADE у БД, ORM не завантажує їх перед видаленням читача
+    loans = relationship("Loan", back_populates="reader", cascade="all, delete-orphan", passive_deletes=True)
     
     __table_args__ = (Index('ix_readers_email', 'email'),)
 
@@ -99,4 +124,56 @@ class Loan(Base):
             unique=True, 
             postgresql_where=(returned_at == None)
         ),
-    )
\ No newline at end of file
+        # Боржники: лише активні видачі, у порядку (due_date, id) для keyset-пагінації
+        Index('ix_loans_active_due', 'due_date', 'id', postgresql_where=(returned_at == None)),
+        # Історія читача, агрегації за читачем і каскадне видалення читача
+        Index('ix_loans_reader_id', 'reader_id'),
+        # Повна історія копії (унікальний індекс покриває лише активні видачі), каскад з book_copies
+        Index('ix_loans_book_copy_id', 'book_copy_id'),
+    )
+
+
+class LoanHistory(Base):
+    """Архів закритих видач, секціонований за місяцем borrowed_at (секції створює archive_closed_loans)."""
+    __tablename__ = 'loan_history'
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    borrowed_at = Column(DateTime(timezone=True), primary_key=True)
+    due_date = Column(Date, nullable=False)
+    returned_at = Column(DateTime(timezone=True), nullable=False)
+
+    book_copy_id = Column(Integer, ForeignKey('book_copies.id', ondelete='CASCADE'), nullable=False)
+    reader_id = Column(Integer, ForeignKey('readers.id', ondelete='CASCADE'), nullable=False)
+
+    __table_args__ = (
+        Index('ix_loan_history_reader_id', 'reader_id'),
+        Index('ix_loan_history_book_copy_id', 'book_copy_id'),
+        {'postgresql_partition_by': 'RANGE (borrowed_at)'},
+    )
+
+
+class ReaderLoanStats(Base):
+    __tablename__ = 'reader_loan_stats'
+    reader_id = Column(Integer, ForeignKey('readers.id', ondelete='CASCADE'), primary_key=True)
+    total_loans = Column(Integer, nullable=False, server_default='0')
+
+    __table_args__ = (
+        Index('ix_reader_loan_stats_total', 'total_loans', 'reader_id'),
+    )
+
+class GenreLoanStats(Base):
+    __tablename__ = 'genre_loan_stats'
+    genre_id = Column(Integer, ForeignKey('genres.id', ondelete='CASCADE'), primary_key=True)
+    total_loans = Column(Integer, nullable=False, server_default='0')
+
+    __table_args__ = (
+        Index('ix_genre_loan_stats_total', 'total_loans'),
+    )
+
+class BookAvailability(Base):
+    """Кількість копій книги в кожному статусі; підтримується сервісами разом зі зміною book_copies.status."""
+    __tablename__ = 'book_availability'
+    book_id = Column(Integer, ForeignKey('books.id', ondelete='CASCADE'), primary_key=True)
+    available = Column(Integer, nullable=False, server_default='0')
+    on_loan = Column(Integer, nullable=False, server_default='0')
+    lost = Column(Integer, nullable=False, server_default='0')
+    maintenance = Column(Integer, nullable=False, server_default='0')
@@ -0,0 +1,65 @@
+import base64
+import json
+import math
+from datetime import date
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(*values):
+    """Пакує ключ сортування останнього рядка сторінки в непрозорий рядок."""
+    raw = json.dumps(list(values), default=date.isoformat, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+# Ключі сортування — колонки Integer, тож значення поза int4 відхиляються тут, а не помилкою в БД
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def cursor_int(value):
+    if isinstance(value, bool) or not isinstance(value, int) or not INT_MIN <= value <= INT_MAX:
+        raise ValueError(value)
+    return value
+
+
+def cursor_number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(value)
+    return float(value)
+
+
+def cursor_date(value):
+    if not isinstance(value, str):
+        raise ValueError(value)
+    return date.fromisoformat(value)
+
+
+def decode_cursor(cursor: str, *types):
+    """Розпаковує курсор і перевіряє кожне значення ключа сортування (cursor_int, cursor_date, ...)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Некоректний курсор пагінації")
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Некоректний курсор пагінації")
+
+    try:
+        return [parse(value) for parse, value in zip(types, values)]
+    except (ValueError, TypeError):
+        raise ValueError("Некоректний курсор пагінації")
+
+
+def make_page(items, limit: int, key, has_more: bool = None):
+    """Формує відповідь зі сторінкою та курсором на наступну (якщо вона може існувати).
+
+    has_more — чи точно є наступна сторінка (запит читав limit + 1 рядків); без нього курсор
+    видається для кожної повної сторінки.
+    """
+    if has_more is None:
+        has_more = bool(items) and len(items) == limit
+    next_cursor = encode_cursor(*key(items[-1])) if has_more else None
+
+    return {"items": items, "next_cursor": next_cursor}
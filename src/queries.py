@@ -1,133 +1,414 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from src.models import Book, Loan, Reader, Genre, BookCopy, Author
-from datetime import datetime
-
-def get_books_by_genre(session: Session, genre_name: str):
-    print(f"\nПошук книг жанру: '{genre_name}'")
-    
-    books = session.query(Book)\
-        .join(Genre)\
-        .filter(Genre.name == genre_name)\
-        .order_by(desc(Book.publication_year))\
-        .all()
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import (
+    func, desc, tuple_, select, union_all, literal, literal_column, cast, case, true, and_, not_,
+    Float, Integer, String
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from src.models import (
+    Book, Loan, LoanHistory, Reader, Genre, BookCopy, Author, ReaderLoanStats, GenreLoanStats, BookAvailability,
+    CopyStatus, book_authors, search_vector
+)
+from src.logging_config import timed
+from src.reference import reference_cache
+from datetime import datetime, date
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+
+def all_loans():
+    """Підзапит з усіма видачами: активні й нещодавні з loans плюс архів loan_history."""
+    columns = ["id", "borrowed_at", "due_date", "returned_at", "book_copy_id", "reader_id"]
+    return union_all(
+        select(*(Loan.__table__.c[name] for name in columns)),
+        select(*(LoanHistory.__table__.c[name] for name in columns)),
+    ).subquery("all_loans")
+
+
+def author_ids(book_id):
+    """id авторів книги одним масивом: корельований підзапит лише до book_authors (без join з authors)."""
+    ids = select(func.array_agg(book_authors.c.author_id))\
+        .where(book_authors.c.book_id == book_id)\
+        .scalar_subquery()
+    return func.coalesce(ids, cast(literal_column("'{}'"), ARRAY(Integer)))
+
+
+def book_columns():
+    """Поля книги для відповідей API (рядки запиту, а не ORM-сутності)."""
+    return (Book.id, Book.title, Book.isbn, Book.publication_year, author_ids(Book.id).label("author_ids"))
+
+
+def with_author_names(session: Session, rows):
+    """Рядки книг -> словники з іменами авторів з кешу довідників (у БД — лише імена, яких там ще немає)."""
+    names = reference_cache.author_names(session, [author_id for row in rows for author_id in row.author_ids])
+
+    books = []
+    for row in rows:
+        book = row._asdict()
+        book["authors"] = sorted(names[author_id] for author_id in book.pop("author_ids") if author_id in names)
+        books.append(book)
+    return books
+
+
+def book_sort_key(row: dict):
+    return (row["publication_year"] or 0, row["id"])
+
+
+@timed(logger)
+def get_books_by_genre(session: Session, genre_name: str, limit: int = None, after=None):
+    logger.info("Пошук книг жанру: '%s'", genre_name, extra={"operation": "books_by_genre"})
+
+    genre_id = reference_cache.genre_id(session, genre_name)
+    if genre_id is None:
+        logger.info("Жанру '%s' немає.", genre_name)
+        return []
+
+    year_key = func.coalesce(Book.publication_year, 0)
+
+    # id жанру з кешу довідників: запит іде прямо по ix_books_genre_year, без join з genres
+    query = session.query(*book_columns())\
+        .filter(Book.genre_id == genre_id)\
+        .order_by(desc(year_key), desc(Book.id))
+
+    if after is not None:
+        query = query.filter(tuple_(year_key, Book.id) < tuple_(*after))
+
+    books = with_author_names(session, query.limit(limit).all())
 
     if not books:
-        print("Нічого не знайдено.")
-    else:
+        logger.info("Нічого не знайдено.")
+    elif logger.isEnabledFor(logging.INFO):
         for book in books:
-            authors = ", ".join([a.full_name for a in book.authors])
-            print(f"{book.title} ({book.publication_year}) — {authors}")
+            logger.info("%s (%s) — %s", book["title"], book["publication_year"], ", ".join(book["authors"]))
 
     return books
 
 
-def get_overdue_loans(session: Session):
-    print(f"\nЗвіт: Боржники")
-    
-    overdue_loans = session.query(Loan).filter(
-        Loan.returned_at == None,
-        Loan.due_date < datetime.now().date()
-    ).all()
+@timed(logger)
+def get_book_availability(session: Session, book_ids: list):
+    """Кількість копій у кожному статусі для списку книг — один запит по первинних ключах.
 
-    api_results = []
+    Книги без копій мають нулі; id, яких немає в каталозі, пропускаються.
+    """
+    return session.query(
+        Book.id.label("book_id"),
+        *(func.coalesce(getattr(BookAvailability, status.name), 0).label(status.name) for status in CopyStatus)
+    )\
+        .outerjoin(BookAvailability, BookAvailability.book_id == Book.id)\
+        .filter(Book.id.in_(book_ids))\
+        .order_by(Book.id)\
+        .all()
 
-    if not overdue_loans:
-        print("Боржників немає! Всі повернули книги вчасно.")
-    else:
-        for loan in overdue_loans:
-            delay = (datetime.now().date() - loan.due_date).days
 
-            print(f"{loan.reader.first_name} {loan.reader.last_name}: "
-                  f"книга '{loan.copy.book.title}' прострочена на {delay} днів")
+# Збіг за префіксом ISBN важить більше за будь-який текстовий збіг
+ISBN_MATCH_SCORE = 1.0
+# Нормалізація ts_rank_cd: ділити на кількість слів, щоб точніший (коротший) збіг був вище
+RANK_NORMALIZATION = 2
+
+# Скільки збігів кожної гілки пошуку (назва, автор, ISBN) ранжувати. Збіги беруться в порядку
+# індексу, тож ранжування не залежить від розміру каталогу; якщо в гілці збігів більше,
+# відповідь позначається truncated — решту збігів не розглянуто, запит варто уточнити
+SEARCH_CANDIDATE_LIMIT = 1000
+# Коротше слово шукається цілим, а не як префікс: префікс з 1-2 літер збігається з більшою
+# частиною каталогу, а ціна GIN-пошуку росте з кількістю збігів ще до будь-якого LIMIT
+SEARCH_MIN_PREFIX = 3
+
+# Панель читача рахує ранг точно лише в межах цього числа: інакше для читача внизу рейтингу
+# підрахунок читачів з більшою кількістю видач проходить майже весь reader_loan_stats
+SUMMARY_RANK_LIMIT = 1000
+
+
+def search_sort_key(row: dict):
+    return (row["score"], row["id"])
+
+
+def _search_terms(phrase: str):
+    """Слова запиту як tsquery: 'дюна гер' -> 'дюна & гер:*'.
+
+    Префіксом шукається лише останнє слово (його ще дописують), і лише від SEARCH_MIN_PREFIX літер;
+    попередні слова — цілими, це дешевший пошук у GIN.
+    """
+    words = re.findall(r"\w+", phrase.lower())
+    if words and len(words[-1]) >= SEARCH_MIN_PREFIX:
+        words[-1] += ":*"
+    return " & ".join(words)
+
+
+@timed(logger)
+def search_books(session: Session, phrase: str, limit: int = None, after=None):
+    """Пошук книг за словами назви, іменем автора або префіксом ISBN, від найрелевантніших.
+
+    Повертає (книги, truncated). Точний збіг назви чи імені автора потрапляє в результат завжди,
+    навіть якщо загальних збігів більше за SEARCH_CANDIDATE_LIMIT.
+    """
+    terms = _search_terms(phrase)
+    if not terms:
+        return [], False
+
+    ts_query = func.to_tsquery(literal_column("'simple'::regconfig"), terms)
+    exact_vector = search_vector(literal(phrase, String))
+    isbn_prefix = re.sub(r"([\\%_])", r"\\\1", phrase.strip()) + "%"
+
+    title_vector = search_vector(Book.title)
+    author_vector = search_vector(Author.full_name)
+    title_score = cast(func.ts_rank_cd(title_vector, ts_query, RANK_NORMALIZATION), Float)
+    author_score = cast(func.ts_rank_cd(author_vector, ts_query, RANK_NORMALIZATION), Float)
+
+    # Кожна гілка обслуговується власним індексом і зупиняється на SEARCH_CANDIDATE_LIMIT + 1 збігу
+    # (зайвий рядок лише показує, що збігів більше): GIN за назвою й автором у порядку індексу,
+    # btree за ISBN у порядку ISBN (USING ~<~ — порядок text_pattern_ops), btree за tsvector для точних
+    # збігів. Сортування гілок за релевантністю означало б ранжувати всі збіги поширеного слова.
+    candidates = SEARCH_CANDIDATE_LIMIT + 1
+    matches = union_all(
+        select(literal("title").label("branch"), Book.id.label("book_id"), title_score.label("score"))
+        .where(title_vector.op("@@")(ts_query))
+        .limit(candidates),
+        select(literal("author"), book_authors.c.book_id, author_score)
+        .join(Author, Author.id == book_authors.c.author_id)
+        .where(author_vector.op("@@")(ts_query))
+        .limit(candidates),
+        select(literal("isbn"), Book.id, cast(literal(ISBN_MATCH_SCORE), Float))
+        .where(Book.isbn.like(isbn_prefix, escape="\\"))
+        .order_by(literal_column("books.isbn USING ~<~"))
+        .limit(candidates),
+        select(literal("exact"), Book.id, title_score)
+        .where(title_vector == exact_vector)
+        .limit(candidates),
+        select(literal("exact"), book_authors.c.book_id, author_score)
+        .join(Author, Author.id == book_authors.c.author_id)
+        .where(author_vector == exact_vector)
+        .limit(candidates),
+    ).cte("matches")
+
+    truncated = select(matches.c.branch)\
+        .where(matches.c.branch != "exact")\
+        .group_by(matches.c.branch)\
+        .having(func.count() > SEARCH_CANDIDATE_LIMIT)\
+        .exists()
+
+    # Сторінка відбирається серед кандидатів до з'єднання з books: дані книг читаються лише для неї
+    score = func.max(matches.c.score).label("score")
+    page = select(matches.c.book_id, score)\
+        .group_by(matches.c.book_id)\
+        .order_by(desc(score), desc(matches.c.book_id))\
+        .limit(limit)
+    if after is not None:
+        page = page.having(tuple_(score, matches.c.book_id) < tuple_(*after))
+    page = page.subquery("page")
+
+    rows = session.query(*book_columns(), page.c.score, truncated.label("truncated"))\
+        .join(page, page.c.book_id == Book.id)\
+        .order_by(desc(page.c.score), desc(Book.id))\
+        .all()
+    books = with_author_names(session, rows)
+    for book in books:
+        del book["truncated"]
+    return books, bool(rows) and rows[0].truncated
+
+
+def overdue_sort_key(row):
+    return (row.due_date, row.loan_id)
+
+
+def overdue_loans_query(session: Session, today: date):
+    """Прострочені активні видачі в порядку (due_date, id) — порядок часткового індексу ix_loans_active_due."""
+    return session.query(
+        Loan.id.label("loan_id"),
+        (Reader.first_name + " " + Reader.last_name).label("reader"),
+        Book.title.label("book"),
+        (literal(today) - Loan.due_date).label("days_overdue"),
+        Loan.due_date
+    )\
+        .join(Reader, Reader.id == Loan.reader_id)\
+        .join(BookCopy, BookCopy.id == Loan.book_copy_id)\
+        .join(Book, Book.id == BookCopy.book_id)\
+        .filter(
+            Loan.returned_at == None,
+            Loan.due_date < today
+        )\
+        .order_by(Loan.due_date, Loan.id)
 
-            api_results.append({
-                "reader": f"{loan.reader.first_name} {loan.reader.last_name}",
-                "book": loan.copy.book.title,
-                "days_overdue": delay,
-                "due_date": loan.due_date
-            })
 
-    return api_results
+@timed(logger)
+def get_overdue_loans(session: Session, limit: int = None, after=None):
+    logger.info("Звіт: Боржники", extra={"operation": "overdue_loans"})
+    today = datetime.now().date()
+    query = overdue_loans_query(session, today)
+
+    if after is not None:
+        due_date, loan_id = after
+        if isinstance(due_date, str):
+            due_date = date.fromisoformat(due_date)
+        query = query.filter(tuple_(Loan.due_date, Loan.id) > tuple_(due_date, loan_id))
+
+    overdue_loans = query.limit(limit).all()
+
+    if not overdue_loans:
+        logger.info("Боржників немає! Всі повернули книги вчасно.")
+    elif logger.isEnabledFor(logging.INFO):
+        for loan in overdue_loans:
+            logger.info("%s: книга '%s' прострочена на %s днів", loan.reader, loan.book, loan.days_overdue)
 
+    return overdue_loans
 
+
+@timed(logger)
 def get_top_readers(session: Session):
-    print(f"\nТоп-5 читачів")
-    
+    logger.info("Топ-5 читачів", extra={"operation": "top_readers"})
+
+    order = (desc(ReaderLoanStats.total_loans), desc(ReaderLoanStats.reader_id))
     results = session.query(
-        Reader.first_name,
-        Reader.last_name,
-        func.count(Loan.id).label('total_books')
+        func.row_number().over(order_by=order).label("rank"),
+        (Reader.first_name + " " + Reader.last_name).label("name"),
+        ReaderLoanStats.total_loans.label("books_count")
     )\
-    .join(Loan)\
-    .group_by(Reader.id)\
-    .order_by(desc('total_books'))\
+    .join(ReaderLoanStats, ReaderLoanStats.reader_id == Reader.id)\
+    .filter(ReaderLoanStats.total_loans > 0)\
+    .order_by(*order)\
     .limit(5)\
     .all()
 
-    api_results = []
-
     if not results:
-        print("Даних ще немає.")
-    
-    for i, (first, last, count) in enumerate(results, 1):
-        print(f"{i}. {first} {last} — взяв(ла) {count} книг")
-        
-        api_results.append({
-            "rank": i,
-            "name": f"{first} {last}",
-            "books_count": count
-        })
-        
-    return api_results
+        logger.info("Даних ще немає.")
 
+    for row in results:
+        logger.info("%s. %s — взяв(ла) %s книг", row.rank, row.name, row.books_count)
 
+    return results
+
+
+@timed(logger)
 def get_genre_popularity(session: Session):
-    print(f"\nПопулярність жанрів")
+    logger.info("Популярність жанрів", extra={"operation": "genre_popularity"})
 
     results = session.query(
-        Genre.name,
-        func.count(Loan.id).label('loan_count')
+        Genre.name.label("genre"),
+        GenreLoanStats.total_loans.label("count")
     )\
-    .select_from(Genre)\
-    .join(Book)\
-    .join(BookCopy)\
-    .join(Loan)\
-    .group_by(Genre.name)\
-    .order_by(desc('loan_count'))\
+    .join(GenreLoanStats, GenreLoanStats.genre_id == Genre.id)\
+    .filter(GenreLoanStats.total_loans > 0)\
+    .order_by(desc(GenreLoanStats.total_loans))\
     .all()
-    
-    api_results = []
-
-    for genre, count in results:
-        print(f"{genre}: видано {count} разів")
-        
-        api_results.append({
-            "genre": genre,
-            "count": count
-        })
-        
-    return api_results
-
-
-def get_reader_ranks(session: Session):
-    reader_stats = session.query(
-        Reader.id,
+
+    for row in results:
+        logger.info("%s: видано %s разів", row.genre, row.count)
+
+    return results
+
+
+def rank_sort_key(row: dict):
+    return (row["total"], row["reader_id"])
+
+
+@timed(logger)
+def get_reader_ranks(session: Session, limit: int = None, after=None):
+    query = session.query(
+        ReaderLoanStats.reader_id.label('id'),
         Reader.first_name,
         Reader.last_name,
-        func.count(Loan.id).label('total_loans')
-    ).join(Loan).group_by(Reader.id).subquery()
+        ReaderLoanStats.total_loans
+    )\
+    .join(Reader, Reader.id == ReaderLoanStats.reader_id)\
+    .filter(ReaderLoanStats.total_loans > 0)\
+    .order_by(desc(ReaderLoanStats.total_loans), desc(ReaderLoanStats.reader_id))
 
-    query = session.query(
-        reader_stats.c.first_name,
-        reader_stats.c.last_name,
-        reader_stats.c.total_loans,
-        func.rank().over(order_by=desc(reader_stats.c.total_loans)).label('rank')
-    )
-    
-    raw_results = query.all()
-
-    return [
-        {"rank": row.rank, "name": f"{row.first_name} {row.last_name}", "total": row.total_loans}
-        for row in raw_results
-    ]
\ No newline at end of file
+    if after is not None:
+        query = query.filter(tuple_(ReaderLoanStats.total_loans, ReaderLoanStats.reader_id) < tuple_(*after))
+
+    raw_results = query.limit(limit).all()
+    if not raw_results:
+        return []
+
+    # Ранг = 1 + кількість читачів з більшою кількістю видач (семантика RANK()).
+    # Замість корельованого підрахунку для кожного рядка рахуємо один раз для першого рядка сторінки:
+    # скільки читачів мають більше видач і скільки з тим самим результатом стоять перед ним.
+    first = raw_results[0]
+    greater, ties_before = session.query(
+        func.count().filter(ReaderLoanStats.total_loans > first.total_loans),
+        func.count().filter(ReaderLoanStats.total_loans == first.total_loans, ReaderLoanStats.reader_id > first.id)
+    ).filter(ReaderLoanStats.total_loans >= first.total_loans).one()
+
+    results = []
+    for position, row in enumerate(raw_results):
+        if row.total_loans == first.total_loans:
+            rank = greater + 1
+        elif row.total_loans != raw_results[position - 1].total_loans:
+            # Усі попередні рядки сторінки (і все до неї) мають більше видач
+            rank = greater + ties_before + position + 1
+        else:
+            rank = results[-1]["rank"]
+
+        results.append({"rank": rank, "reader_id": row.id, "name": f"{row.first_name} {row.last_name}", "total": row.total_loans})
+
+    return results
+
+
+@timed(logger)
+def get_reader_summary(session: Session, reader_id: int):
+    """Панель читача одним запитом: активні видачі з назвами книг, прострочення, загальна кількість і ранг.
+
+    Загальна кількість береться з лічильника reader_loan_stats, а ранг — як у get_reader_ranks
+    (1 + кількість читачів з більшою кількістю видач) підрахунком по індексу ix_reader_loan_stats_total,
+    без ранжування всіх читачів. Підрахунок зупиняється на SUMMARY_RANK_LIMIT: нижче за цю позицію
+    rank — None, а rank_truncated — True. Історія видач не читається.
+    """
+    today = datetime.now().date()
+
+    active = select(
+        func.coalesce(
+            func.json_agg(aggregate_order_by(
+                func.json_build_object(
+                    "loan_id", Loan.id,
+                    "book_copy_id", Loan.book_copy_id,
+                    "book_id", Book.id,
+                    "title", Book.title,
+                    "borrowed_at", Loan.borrowed_at,
+                    "due_date", Loan.due_date
+                ),
+                Loan.due_date, Loan.id
+            )),
+            literal_column("'[]'::json")
+        ).label("active_loans"),
+        func.count().filter(Loan.due_date < today).label("overdue_count")
+    )\
+        .join(BookCopy, BookCopy.id == Loan.book_copy_id)\
+        .join(Book, Book.id == BookCopy.book_id)\
+        .where(Loan.reader_id == reader_id, Loan.returned_at == None)\
+        .subquery("active")
+
+    # Ранг через LATERAL-підзапит до власного рядка: межа total_loans відома планувальнику як значення
+    # рядка, тож підрахунок іде по індексу (а не послідовним скануванням з оцінкою «третина таблиці»)
+    # і обривається після SUMMARY_RANK_LIMIT читачів
+    own, other = aliased(ReaderLoanStats), aliased(ReaderLoanStats)
+    above = select(other.reader_id)\
+        .where(other.total_loans > own.total_loans)\
+        .order_by(other.total_loans.desc())\
+        .limit(SUMMARY_RANK_LIMIT)\
+        .lateral("above")
+    standing = select(
+        func.max(own.total_loans).label("total_loans"),
+        func.count(above.c.reader_id).label("greater")
+    )\
+        .select_from(own)\
+        .outerjoin(above, true())\
+        .where(own.reader_id == reader_id)\
+        .subquery("standing")
+    total = func.coalesce(standing.c.total_loans, 0)
+    truncated = and_(total > 0, standing.c.greater >= SUMMARY_RANK_LIMIT)
+
+    return session.query(
+        Reader.id.label("reader_id"),
+        (Reader.first_name + " " + Reader.last_name).label("name"),
+        total.label("total_loans"),
+        # Читачі без видач у рейтингу не беруть участі (як у get_reader_ranks)
+        case((and_(total > 0, not_(truncated)), standing.c.greater + 1)).label("rank"),
+        truncated.label("rank_truncated"),
+        active.c.overdue_count,
+        active.c.active_loans
+    )\
+        .select_from(Reader)\
+        .join(active, true())\
+        .join(standing, true())\
+        .filter(Reader.id == reader_id)\
+        .one_or_none()
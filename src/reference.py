@@ -0,0 +1,114 @@
+"""Кеш довідників у пам'яті процесу: жанри (назва <-> id) та імена авторів за id.
+
+Жанрів мало, тож таблиця завантажується цілком під час першого звернення; авторів може бути
+сотні тисяч, тому їхні імена підтягуються пакетно лише для потрібних id (з обмеженням розміру).
+
+Актуальність:
+* зміни через ORM (Genre/Author у flush) скидають кеш після commit — у тому ж процесі одразу;
+* зміни з інших процесів (інші воркери, COPY генератора) підхоплюються через REFERENCE_CACHE_TTL;
+* невідома назва жанру перевіряється в БД, тож новий жанр видно одразу, а не після TTL.
+"""
+import logging
+import os
+import threading
+import time
+from itertools import chain
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.cache import TTLCache
+from src.models import Author, Genre
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "300"))
+AUTHOR_CACHE_SIZE = int(os.getenv("AUTHOR_CACHE_SIZE", "100000"))
+
+
+class GenreMaps:
+    def __init__(self, rows, loaded_at: float):
+        self.loaded_at = loaded_at
+        self.ids = {row.name: row.id for row in rows}
+        self.names = {row.id: row.name for row in rows}
+
+
+class ReferenceCache:
+    def __init__(self, ttl: float = REFERENCE_CACHE_TTL, author_cache_size: int = AUTHOR_CACHE_SIZE,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._genres = None
+        self._generation = 0
+        self.authors = TTLCache(maxsize=author_cache_size, ttl=ttl, clock=clock)
+        self.genre_loads = 0
+
+    def _genre_maps(self, session: Session) -> GenreMaps:
+        with self._lock:
+            genres, generation = self._genres, self._generation
+        if genres is not None and genres.loaded_at + self.ttl > self._clock():
+            return genres
+
+        genres = GenreMaps(session.query(Genre.id, Genre.name).all(), self._clock())
+        with self._lock:
+            # Інвалідація під час завантаження: результат міг не побачити зміну, не зберігаємо його
+            if generation == self._generation:
+                self._genres = genres
+                self.genre_loads += 1
+        return genres
+
+    def genre_id(self, session: Session, name: str):
+        genre_id = self._genre_maps(session).ids.get(name)
+        if genre_id is None:
+            genre_id = session.query(Genre.id).filter(Genre.name == name).scalar()
+            if genre_id is not None:
+                logger.info("Жанр '%s' з'явився після завантаження довідника, оновлюємо", name)
+                self.invalidate()
+        return genre_id
+
+    def genre_name(self, session: Session, genre_id: int):
+        return self._genre_maps(session).names.get(genre_id)
+
+    def author_names(self, session: Session, author_ids) -> dict:
+        names = {}
+        missing = []
+        for author_id in set(author_ids):
+            found, name = self.authors.get(author_id)
+            if found:
+                names[author_id] = name
+            else:
+                missing.append(author_id)
+
+        if missing:
+            generation = self.authors.generation
+            for row in session.query(Author.id, Author.full_name).filter(Author.id.in_(missing)):
+                names[row.id] = row.full_name
+                self.authors.set(row.id, row.full_name, generation)
+        return names
+
+    def invalidate(self):
+        with self._lock:
+            self._genres = None
+            self._generation += 1
+        self.authors.clear()
+
+
+reference_cache = ReferenceCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_reference_changes(session, flush_context):
+    if any(isinstance(obj, (Genre, Author)) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info["reference_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("reference_changed", False):
+        reference_cache.invalidate()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back_changes(session, previous_transaction):
+    session.info.pop("reference_changed", None)
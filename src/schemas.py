@@ -0,0 +1,214 @@
+from datetime import date, datetime
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+MAX_BULK_ITEMS = 1000
+
+
+class BulkBorrowRequest(BaseModel):
+    reader_id: int
+    book_copy_ids: List[int] = Field(min_length=1, max_length=MAX_BULK_ITEMS)
+    days: int = 14
+
+
+class BulkReturnRequest(BaseModel):
+    book_copy_ids: List[int] = Field(min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class BulkDeleteReadersRequest(BaseModel):
+    reader_ids: List[int] = Field(min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class RowModel(BaseModel):
+    """Відповідь, що будується напряму з рядків запиту (Row) або словників, без ORM-сутностей."""
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BookItem(RowModel):
+    id: int
+    title: str
+    isbn: Optional[str] = None
+    publication_year: Optional[int] = None
+    authors: List[str]
+
+
+class BookPage(BaseModel):
+    items: List[BookItem]
+    next_cursor: Optional[str] = None
+
+
+class BookAvailabilityItem(RowModel):
+    book_id: int
+    available: int
+    on_loan: int
+    lost: int
+    maintenance: int
+
+
+class BookSearchItem(BookItem):
+    score: float
+
+
+class BookSearchPage(BaseModel):
+    items: List[BookSearchItem]
+    next_cursor: Optional[str] = None
+    # Збігів більше, ніж пошук ранжує: після останньої сторінки є ще результати, запит варто уточнити
+    truncated: bool = False
+
+
+class OverdueLoan(RowModel):
+    loan_id: int
+    reader: str
+    book: str
+    days_overdue: int
+    due_date: date
+
+
+class OverduePage(BaseModel):
+    items: List[OverdueLoan]
+    next_cursor: Optional[str] = None
+
+
+class TopReader(RowModel):
+    rank: int
+    name: str
+    books_count: int
+
+
+class GenrePopularity(RowModel):
+    genre: str
+    count: int
+
+
+class ReaderRank(RowModel):
+    rank: int
+    reader_id: int
+    name: str
+    total: int
+
+
+class ReaderRankPage(BaseModel):
+    items: List[ReaderRank]
+    next_cursor: Optional[str] = None
+
+
+class ActiveLoan(BaseModel):
+    loan_id: int
+    book_copy_id: int
+    book_id: int
+    title: str
+    borrowed_at: datetime
+    due_date: date
+
+
+class ReaderSummary(RowModel):
+    reader_id: int
+    name: str
+    total_loans: int
+    rank: Optional[int] = None
+    # Читач нижче за SUMMARY_RANK_LIMIT позицій: ранг не рахується
+    rank_truncated: bool = False
+    overdue_count: int
+    active_loans: List[ActiveLoan]
+
+
+class CacheStats(BaseModel):
+    size: int
+    maxsize: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+
+
+class PoolStatus(BaseModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    timeout_seconds: float
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_total_ms: float = 0.0
+    wait_avg_ms: float = 0.0
+    wait_max_ms: float = 0.0
+
+
+class PoolStats(BaseModel):
+    sync: PoolStatus
+    async_: Optional[PoolStatus] = Field(None, alias="async")
+    replica: Optional[PoolStatus] = None
+    replica_async: Optional[PoolStatus] = None
+
+
+class ReplicaStatus(BaseModel):
+    configured: bool
+    healthy: Optional[bool] = None
+    lag_seconds: Optional[float] = None
+    max_lag_seconds: Optional[float] = None
+    fallbacks: Optional[int] = None
+    uncached_reads: Optional[int] = None
+
+
+class BorrowResponse(BaseModel):
+    message: str
+    loan_id: int
+    due_date: date
+
+
+class BorrowAnyCopyResponse(BorrowResponse):
+    book_copy_id: int
+
+
+class ReturnResponse(BaseModel):
+    message: str
+    returned_at: datetime
+
+
+class BulkBorrowItem(BaseModel):
+    book_copy_id: int
+    ok: bool
+    loan_id: Optional[int] = None
+    due_date: Optional[date] = None
+    error: Optional[str] = None
+
+
+class BulkBorrowResponse(BaseModel):
+    issued: int
+    results: List[BulkBorrowItem]
+
+
+class BulkReturnItem(BaseModel):
+    book_copy_id: int
+    ok: bool
+    loan_id: Optional[int] = None
+    returned_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+class BulkReturnResponse(BaseModel):
+    returned: int
+    results: List[BulkReturnItem]
+
+
+class DeleteReaderResponse(BaseModel):
+    status: str
+    reader_id: int
+    name: str
+    loans_deleted: int
+
+
+class BulkDeleteReaderItem(BaseModel):
+    reader_id: int
+    ok: bool
+    name: Optional[str] = None
+    loans_deleted: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkDeleteReadersResponse(BaseModel):
+    deleted: int
+    results: List[BulkDeleteReaderItem]
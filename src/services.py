@@ -1,39 +1,279 @@
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from src.models import Loan, BookCopy, Reader, CopyStatus
+from sqlalchemy.orm import Session, attributes
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy import event, func, select, insert, delete, update, literal, text, Date
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, date, timedelta, timezone
+from src.models import (
+    Loan, LoanHistory, BookCopy, Reader, Book, CopyStatus, ReaderLoanStats, GenreLoanStats, BookAvailability
+)
+from src.queries import all_loans
+from src.cache import analytics_cache
+from src.logging_config import timed
+import logging
+import os
 
+logger = logging.getLogger(__name__)
+
+# Закриті видачі, старші за стільки днів (за returned_at), переносяться в loan_history
+LOAN_ARCHIVE_AFTER_DAYS = int(os.getenv("LOAN_ARCHIVE_AFTER_DAYS", "365"))
+LOAN_ARCHIVE_BATCH_SIZE = int(os.getenv("LOAN_ARCHIVE_BATCH_SIZE", "10000"))
+
+
+class CopyUnavailableError(ValueError):
+    """Копія не доступна для видачі (вже видана, втрачена або її щойно забрав інший запит)."""
+
+
+def _claim_copy(book_copy_id: int):
+    """CTE, що атомарно переводить копію з available в on_loan (умовний UPDATE ... RETURNING)."""
+    return update(BookCopy)\
+        .where(BookCopy.id == book_copy_id, BookCopy.status == CopyStatus.available)\
+        .values(status=CopyStatus.on_loan)\
+        .returning(BookCopy.id, BookCopy.book_id)\
+        .cte("claimed")
+
+
+def _claim_any_copy(book_id: int):
+    """CTE, що захоплює будь-яку вільну копію книги, пропускаючи рядки, заблоковані іншими транзакціями."""
+    picked = select(BookCopy.id)\
+        .where(BookCopy.book_id == book_id, BookCopy.status == CopyStatus.available)\
+        .order_by(BookCopy.id)\
+        .limit(1)\
+        .with_for_update(skip_locked=True)\
+        .cte("picked")
+
+    return update(BookCopy)\
+        .where(BookCopy.id == picked.c.id, BookCopy.status == CopyStatus.available)\
+        .values(status=CopyStatus.on_loan)\
+        .returning(BookCopy.id, BookCopy.book_id)\
+        .cte("claimed")
+
+
+def _claim_copies(book_copy_ids: list):
+    """CTE, що захоплює всі вільні копії зі списку; блокування беруться в порядку id, щоб уникнути deadlock."""
+    picked = select(BookCopy.id)\
+        .where(BookCopy.id.in_(book_copy_ids), BookCopy.status == CopyStatus.available)\
+        .order_by(BookCopy.id)\
+        .with_for_update()\
+        .cte("picked")
+
+    return update(BookCopy)\
+        .where(BookCopy.id == picked.c.id, BookCopy.status == CopyStatus.available)\
+        .values(status=CopyStatus.on_loan)\
+        .returning(BookCopy.id, BookCopy.book_id)\
+        .cte("claimed")
+
+
+def _lock_copy(session: Session, book_copy_id: int):
+    """Блокує копію (SELECT ... FOR UPDATE) і перечитує її статус: _count_updated_copy рахує зсув лічильників від нього."""
+    return session.query(BookCopy)\
+        .filter(BookCopy.id == book_copy_id)\
+        .with_for_update()\
+        .populate_existing()\
+        .first()
+
+
+def _copy_status(status: CopyStatus):
+    return literal(status, BookCopy.status.type)
+
+
+def _availability_changes(changes):
+    """CTE, що зсуває лічильники book_availability для копій, які змінили статус.
+
+    `changes` — select з колонками book_id, old_status, new_status (рядок на кожну копію).
+    """
+    changes = changes.subquery("changes")
+    delta = select(changes.c.book_id, *(
+        (func.count().filter(changes.c.new_status == status) - func.count().filter(changes.c.old_status == status))
+        .label(status.name)
+        for status in CopyStatus
+    )).group_by(changes.c.book_id).subquery("delta")
+
+    return update(BookAvailability)\
+        .where(BookAvailability.book_id == delta.c.book_id)\
+        .values({status.name: getattr(BookAvailability, status.name) + delta.c[status.name] for status in CopyStatus})\
+        .cte("availability")
+
+
+def _recount_availability(connection, book_id: int):
+    """Перераховує лічильники однієї книги з book_copies (індекс ix_book_copies_book_id)."""
+    counts = {
+        status.name: select(func.count()).where(BookCopy.book_id == book_id, BookCopy.status == status).scalar_subquery()
+        for status in CopyStatus
+    }
+    statement = pg_insert(BookAvailability).values(book_id=book_id, **counts)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[BookAvailability.book_id],
+        set_={name: statement.excluded[name] for name in counts}
+    ))
+
+
+# Зміни копій через ORM (нові копії, return_book, report_lost_book) оновлюють лічильники в тому ж flush;
+# Core-запити сервісів (видача, пакетне повернення) роблять це у власних CTE через _availability_changes
+@event.listens_for(BookCopy, "after_insert")
+def _count_inserted_copy(mapper, connection, target):
+    status = (target.status or CopyStatus.available).name
+    statement = pg_insert(BookAvailability).values(book_id=target.book_id, **{status: 1})
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[BookAvailability.book_id],
+        set_={status: getattr(BookAvailability, status) + 1}
+    ))
+
+
+@event.listens_for(BookCopy, "after_update")
+def _count_updated_copy(mapper, connection, target):
+    book_history = attributes.get_history(target, "book_id")
+    if book_history.has_changes():
+        for book_id in {*book_history.deleted, *book_history.added}:
+            _recount_availability(connection, book_id)
+        return
+
+    status_history = attributes.get_history(target, "status")
+    if not status_history.has_changes():
+        return
+    if not status_history.deleted:
+        # Попередній статус не був завантажений — рахуємо книгу заново
+        _recount_availability(connection, target.book_id)
+        return
+
+    old, new = status_history.deleted[0].name, status_history.added[0].name
+    if old != new:
+        connection.execute(
+            update(BookAvailability)
+            .where(BookAvailability.book_id == target.book_id)
+            .values({old: getattr(BookAvailability, old) - 1, new: getattr(BookAvailability, new) + 1})
+        )
+
+
+@event.listens_for(BookCopy, "after_delete")
+def _count_deleted_copy(mapper, connection, target):
+    _recount_availability(connection, target.book_id)
+
+
+def _borrow_statement(claimed, reader_id: int, due_date: date):
+    """Один SQL-запит: вставка видач для захоплених копій та оновлення лічильників.
+
+    `claimed` — CTE з колонками id та book_id копій, які вже переведені в on_loan.
+    Повертає рядки нових записів loans.
+    """
+    new_loans = insert(Loan).from_select(
+        ["book_copy_id", "reader_id", "borrowed_at", "due_date"],
+        select(claimed.c.id, literal(reader_id), func.now(), literal(due_date, Date))
+    ).returning(*Loan.__table__.c).cte("new_loans")
+
+    reader_stats = pg_insert(ReaderLoanStats).from_select(
+        ["reader_id", "total_loans"],
+        select(new_loans.c.reader_id, func.count()).group_by(new_loans.c.reader_id)
+    )
+    reader_stats = reader_stats.on_conflict_do_update(
+        index_elements=[ReaderLoanStats.reader_id],
+        set_={"total_loans": ReaderLoanStats.total_loans + reader_stats.excluded.total_loans}
+    ).cte("reader_stats")
+
+    genre_stats = pg_insert(GenreLoanStats).from_select(
+        ["genre_id", "total_loans"],
+        select(Book.genre_id, func.count())
+        .select_from(new_loans)
+        .join(claimed, claimed.c.id == new_loans.c.book_copy_id)
+        .join(Book, Book.id == claimed.c.book_id)
+        .where(Book.genre_id != None)
+        .group_by(Book.genre_id)
+    )
+    genre_stats = genre_stats.on_conflict_do_update(
+        index_elements=[GenreLoanStats.genre_id],
+        set_={"total_loans": GenreLoanStats.total_loans + genre_stats.excluded.total_loans}
+    ).cte("genre_stats")
+
+    availability = _availability_changes(select(
+        claimed.c.book_id,
+        _copy_status(CopyStatus.available).label("old_status"),
+        _copy_status(CopyStatus.on_loan).label("new_status")
+    ))
+
+    return select(new_loans).add_cte(reader_stats).add_cte(genre_stats).add_cte(availability)
+
+
+def _run_borrow(session: Session, statement, reader_id: int):
+    try:
+        return session.scalars(select(Loan).from_statement(statement)).all()
+    except IntegrityError:
+        session.rollback()
+        if session.get(Reader, reader_id) is None:
+            raise ValueError(f"Помилка: Читача з ID {reader_id} не знайдено.")
+        raise CopyUnavailableError("Відмова: Ця книга вже видана іншому читачеві.")
+
+
+def _genre_loans_of_readers(reader_ids: list):
+    loans = all_loans()
+    return select(Book.genre_id, func.count(loans.c.id).label('loan_count'))\
+        .select_from(loans)\
+        .join(BookCopy, BookCopy.id == loans.c.book_copy_id)\
+        .join(Book, Book.id == BookCopy.book_id)\
+        .where(loans.c.reader_id.in_(reader_ids), Book.genre_id != None)\
+        .group_by(Book.genre_id)\
+        .subquery()
+
+
+def _discount_reader_loans(session: Session, reader_ids: list):
+    """Віднімає історію читачів від лічильників жанрів (рядки читачів видаляє CASCADE)."""
+    per_genre = _genre_loans_of_readers(reader_ids)
+    session.execute(
+        update(GenreLoanStats)
+        .where(GenreLoanStats.genre_id == per_genre.c.genre_id)
+        .values(total_loans=GenreLoanStats.total_loans - per_genre.c.loan_count)
+    )
+
+
+@timed(logger)
 def create_loan(session: Session, book_copy_id: int, reader_id: int, days: int = 14):
-    print(f"\nСпроба видати копію #{book_copy_id} читачеві #{reader_id}")
+    logger.info("Спроба видати копію #%s читачеві #%s", book_copy_id, reader_id,
+                extra={"operation": "create_loan", "book_copy_id": book_copy_id, "reader_id": reader_id})
 
     try:
-        copy = session.query(BookCopy).filter(BookCopy.id == book_copy_id).first()
-        if not copy:
-            raise ValueError(f"Помилка: Копію книги з ID {book_copy_id} не знайдено.")
+        due_date = date.today() + timedelta(days=days)
+        loans = _run_borrow(session, _borrow_statement(_claim_copy(book_copy_id), reader_id, due_date), reader_id)
 
-        reader = session.query(Reader).filter(Reader.id == reader_id).first()
-        if not reader:
-            raise ValueError(f"Помилка: Читача з ID {reader_id} не знайдено.")
+        if not loans:
+            # Нічого не захоплено: з'ясовуємо причину окремим запитом (рідкісний шлях)
+            status = session.scalar(select(BookCopy.status).where(BookCopy.id == book_copy_id))
+            if status is None:
+                raise ValueError(f"Помилка: Копію книги з ID {book_copy_id} не знайдено.")
+            raise CopyUnavailableError(f"Відмова: Ця книга зараз недоступна (Статус: {status.value})")
 
-        if copy.status != CopyStatus.available:
-            raise ValueError(f"Відмова: Ця книга зараз недоступна (Статус: {copy.status.value})")
+        new_loan = loans[0]
+        session.commit()
+        analytics_cache.clear()
 
-        new_loan = Loan(
-            book_copy_id=copy.id,
-            reader_id=reader.id,
-            borrowed_at=datetime.now(),
-            due_date=datetime.now().date() + timedelta(days=days),
-            returned_at=None
-        )
-        session.add(new_loan)
+        logger.info("Копію #%s видано. Запис #%s, повернути до %s", book_copy_id, new_loan.id, new_loan.due_date,
+                    extra={"operation": "create_loan", "loan_id": new_loan.id})
 
-        copy.status = CopyStatus.on_loan
-        session.add(copy)
+        return new_loan
+
+    except Exception as e:
+        session.rollback()
+        raise e
+
+
+@timed(logger)
+def borrow_any_copy(session: Session, book_id: int, reader_id: int, days: int = 14):
+    logger.info("Спроба видати будь-яку копію книги #%s читачеві #%s", book_id, reader_id,
+                extra={"operation": "borrow_any_copy", "book_id": book_id, "reader_id": reader_id})
 
+    try:
+        due_date = date.today() + timedelta(days=days)
+        loans = _run_borrow(session, _borrow_statement(_claim_any_copy(book_id), reader_id, due_date), reader_id)
+
+        if not loans:
+            if session.get(Book, book_id) is None:
+                raise ValueError(f"Помилка: Книгу з ID {book_id} не знайдено.")
+            raise CopyUnavailableError("Відмова: Усі копії цієї книги зараз видані.")
+
+        new_loan = loans[0]
         session.commit()
-        session.refresh(new_loan)
+        analytics_cache.clear()
 
-        print(f"Книгу '{copy.book.title}' видано.")
-        print(f"Запис #{new_loan.id}, повернути до {new_loan.due_date}")
+        logger.info("Видано копію #%s. Запис #%s, повернути до %s", new_loan.book_copy_id, new_loan.id, new_loan.due_date,
+                    extra={"operation": "borrow_any_copy", "loan_id": new_loan.id, "book_copy_id": new_loan.book_copy_id})
 
         return new_loan
 
@@ -42,10 +282,14 @@ def create_loan(session: Session, book_copy_id: int, reader_id: int, days: int =
         raise e
 
 
+@timed(logger)
 def return_book(session: Session, book_copy_id: int):
-    print(f"\nСпроба повернути копію #{book_copy_id}")
+    logger.info("Спроба повернути копію #%s", book_copy_id,
+                extra={"operation": "return_book", "book_copy_id": book_copy_id})
 
     try:
+        # Блокування копії серіалізує повернення/списання, тож статус для лічильників актуальний
+        _lock_copy(session, book_copy_id)
         loan = session.query(Loan).filter(
             Loan.book_copy_id == book_copy_id,
             Loan.returned_at == None
@@ -61,37 +305,178 @@ def return_book(session: Session, book_copy_id: int):
         session.add(loan.copy)
 
         session.commit()
+        analytics_cache.clear()
         
-        print(f"Книгу повернуто. Дата закриття: {loan.returned_at}")
+        logger.info("Книгу повернуто. Дата закриття: %s", loan.returned_at,
+                    extra={"operation": "return_book", "loan_id": loan.id})
         return loan
 
     except Exception as e:
         session.rollback()
         raise e
-    
 
+
+def _unique_ids(ids: list):
+    return list(dict.fromkeys(ids))
+
+
+@timed(logger)
+def bulk_create_loans(session: Session, book_copy_ids: list, reader_id: int, days: int = 14):
+    """Видає список копій одному читачеві одним запитом і однією транзакцією.
+
+    Повертає результат для кожної копії у порядку запиту; недоступні копії не зривають видачу решти.
+    """
+    book_copy_ids = _unique_ids(book_copy_ids)
+    logger.info("Пакетна видача %s копій читачеві #%s", len(book_copy_ids), reader_id,
+                extra={"operation": "bulk_create_loans", "reader_id": reader_id})
+
+    try:
+        due_date = date.today() + timedelta(days=days)
+        loans = _run_borrow(session, _borrow_statement(_claim_copies(book_copy_ids), reader_id, due_date), reader_id)
+        issued = {loan.book_copy_id: loan for loan in loans}
+
+        missing = [copy_id for copy_id in book_copy_ids if copy_id not in issued]
+        statuses = {}
+        if missing:
+            statuses = dict(session.execute(
+                select(BookCopy.id, BookCopy.status).where(BookCopy.id.in_(missing))
+            ).all())
+
+        results = []
+        for copy_id in book_copy_ids:
+            loan = issued.get(copy_id)
+            if loan is not None:
+                results.append({"book_copy_id": copy_id, "ok": True, "loan_id": loan.id, "due_date": loan.due_date})
+            elif copy_id not in statuses:
+                results.append({"book_copy_id": copy_id, "ok": False, "error": "Копію не знайдено"})
+            else:
+                results.append({"book_copy_id": copy_id, "ok": False, "error": f"Копія недоступна (Статус: {statuses[copy_id].value})"})
+
+        session.commit()
+        analytics_cache.clear()
+
+        logger.info("Видано %s з %s копій.", len(issued), len(book_copy_ids),
+                    extra={"operation": "bulk_create_loans", "reader_id": reader_id})
+        return results
+
+    except Exception as e:
+        session.rollback()
+        raise e
+
+
+@timed(logger)
+def bulk_return_books(session: Session, book_copy_ids: list):
+    """Повертає список копій: закриття видач і звільнення копій — один запит, одна транзакція."""
+    book_copy_ids = _unique_ids(book_copy_ids)
+    logger.info("Пакетне повернення %s копій", len(book_copy_ids), extra={"operation": "bulk_return_books"})
+
+    try:
+        # Заблоковані рядки дають статус копії до оновлення (RETURNING повертає лише нові значення),
+        # причому останній зафіксований, а не зі знімка запиту
+        locked = select(BookCopy.id, BookCopy.status)\
+            .where(BookCopy.id.in_(book_copy_ids))\
+            .order_by(BookCopy.id)\
+            .with_for_update()\
+            .cte("locked")
+
+        closed = update(Loan)\
+            .where(Loan.book_copy_id == locked.c.id, Loan.returned_at == None)\
+            .values(returned_at=func.now())\
+            .returning(Loan.id, Loan.book_copy_id, Loan.returned_at)\
+            .cte("closed")
+
+        released = update(BookCopy)\
+            .where(BookCopy.id == closed.c.book_copy_id, locked.c.id == BookCopy.id)\
+            .values(status=CopyStatus.available)\
+            .returning(BookCopy.book_id, locked.c.status.label("old_status"))\
+            .cte("released")
+
+        availability = _availability_changes(select(
+            released.c.book_id, released.c.old_status, _copy_status(CopyStatus.available).label("new_status")
+        ))
+
+        rows = session.execute(select(closed).add_cte(released).add_cte(availability)).all()
+        returned = {row.book_copy_id: row for row in rows}
+
+        session.commit()
+        analytics_cache.clear()
+
+        results = []
+        for copy_id in book_copy_ids:
+            row = returned.get(copy_id)
+            if row is not None:
+                results.append({"book_copy_id": copy_id, "ok": True, "loan_id": row.id, "returned_at": row.returned_at})
+            else:
+                results.append({"book_copy_id": copy_id, "ok": False, "error": "Копія зараз не числиться як видана"})
+
+        logger.info("Повернуто %s з %s копій.", len(returned), len(book_copy_ids),
+                    extra={"operation": "bulk_return_books"})
+        return results
+
+    except Exception as e:
+        session.rollback()
+        raise e
+
+
+def _delete_readers(session: Session, reader_ids: list):
+    """Видаляє читачів одним DELETE ... RETURNING; їхні видачі та лічильник прибирає CASCADE у БД.
+
+    Кількість видач рахується в тому ж запиті: CTE бачать знімок до видалення. Видачі не
+    завантажуються в сесію, тож час і пам'ять не залежать від довжини історії читачів.
+    """
+    _discount_reader_loans(session, reader_ids)
+
+    loans = all_loans()
+    counts = select(loans.c.reader_id, func.count().label("loans_count"))\
+        .where(loans.c.reader_id.in_(reader_ids))\
+        .group_by(loans.c.reader_id)\
+        .cte("counts")
+
+    deleted = delete(Reader)\
+        .where(Reader.id.in_(reader_ids))\
+        .returning(Reader.id, Reader.first_name, Reader.last_name)\
+        .cte("deleted")
+
+    rows = session.execute(
+        select(
+            deleted.c.id,
+            (deleted.c.first_name + " " + deleted.c.last_name).label("name"),
+            func.coalesce(counts.c.loans_count, 0).label("loans_count")
+        )
+        .select_from(deleted)
+        .outerjoin(counts, counts.c.reader_id == deleted.c.id)
+        .add_cte(counts)
+    ).all()
+
+    # Завантажені раніше об'єкти видалених читачів від'єднуємо від сесії, як після session.delete()
+    for row in rows:
+        reader = session.identity_map.get(identity_key(Reader, row.id))
+        if reader is not None:
+            session.expunge(reader)
+    return rows
+
+
+@timed(logger)
 def delete_reader(session: Session, reader_id: int):
-    print(f"\nСпроба видалити читача #{reader_id}")
+    logger.info("Спроба видалити читача #%s", reader_id, extra={"operation": "delete_reader", "reader_id": reader_id})
     
     try:
-        reader = session.query(Reader).filter(Reader.id == reader_id).first()
-        if not reader:
+        deleted = _delete_readers(session, [reader_id])
+        if not deleted:
             raise ValueError(f"Читача {reader_id} не знайдено")
 
-        name = f"{reader.first_name} {reader.last_name}"
-        loans_count = len(reader.loans) 
-
-        session.delete(reader)
+        row = deleted[0]
         session.commit()
+        analytics_cache.clear()
 
-        print(f"Читача '{name}' успішно видалено.")
-        print(f"Також автоматично видалено {loans_count} записів з його історії (CASCADE).")
+        logger.info("Читача '%s' успішно видалено. Також автоматично видалено %s записів з його історії (CASCADE).",
+                    row.name, row.loans_count, extra={"operation": "delete_reader", "reader_id": reader_id})
         
         return {
             "status": "deleted", 
             "reader_id": reader_id, 
-            "name": name, 
-            "loans_deleted": loans_count
+            "name": row.name,
+            "loans_deleted": row.loans_count
         }
     
     except Exception as e:
@@ -99,23 +484,187 @@ def delete_reader(session: Session, reader_id: int):
         raise e
 
 
+@timed(logger)
+def bulk_delete_readers(session: Session, reader_ids: list):
+    """Видаляє до MAX_BULK_ITEMS читачів однією транзакцією (наприклад, очищення неактивних акаунтів)."""
+    reader_ids = _unique_ids(reader_ids)
+    logger.info("Масове видалення %s читачів", len(reader_ids), extra={"operation": "bulk_delete_readers"})
+
+    try:
+        deleted = {row.id: row for row in _delete_readers(session, reader_ids)}
+        session.commit()
+        if deleted:
+            analytics_cache.clear()
+
+        results = []
+        for reader_id in reader_ids:
+            row = deleted.get(reader_id)
+            if row is not None:
+                results.append({"reader_id": reader_id, "ok": True, "name": row.name, "loans_deleted": row.loans_count})
+            else:
+                results.append({"reader_id": reader_id, "ok": False, "error": f"Читача {reader_id} не знайдено"})
+
+        logger.info("Видалено %s з %s читачів, %s записів історії.", len(deleted), len(reader_ids),
+                    sum(row.loans_count for row in deleted.values()), extra={"operation": "bulk_delete_readers"})
+        return results
+
+    except Exception as e:
+        session.rollback()
+        raise e
+
+
+@timed(logger)
 def report_lost_book(session: Session, book_copy_id: int):
-    print(f"\nСписання книги #{book_copy_id} (Втрачена)")
+    logger.info("Списання книги #%s (Втрачена)", book_copy_id,
+                extra={"operation": "report_lost_book", "book_copy_id": book_copy_id})
     
     try:
-        copy = session.query(BookCopy).filter(BookCopy.id == book_copy_id).first()
+        copy = _lock_copy(session, book_copy_id)
         if not copy:
             raise ValueError(f"Копію {book_copy_id} не знайдено")
 
         copy.status = CopyStatus.lost
         session.add(copy)
         session.commit()
+        analytics_cache.clear()
 
-        print(f"Книгу '{copy.book.title}' позначено як ВТРАЧЕНУ.")
-        print("Вона більше не доступна для видачі, але залишилась в базі.")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Книгу '%s' позначено як ВТРАЧЕНУ. Вона більше не доступна для видачі, але залишилась в базі.",
+                        copy.book.title, extra={"operation": "report_lost_book", "book_copy_id": book_copy_id})
         
         return copy
 
     except Exception as e:
         session.rollback()
-        raise e
\ No newline at end of file
+        raise e
+
+
+def rebuild_loan_stats(session: Session):
+    """Повністю перераховує лічильники видач з loans і архіву loan_history (після масового імпорту)."""
+    try:
+        session.execute(delete(ReaderLoanStats))
+        session.execute(delete(GenreLoanStats))
+
+        loans = all_loans()
+        session.execute(pg_insert(ReaderLoanStats).from_select(
+            ['reader_id', 'total_loans'],
+            select(loans.c.reader_id, func.count(loans.c.id)).group_by(loans.c.reader_id)
+        ))
+        session.execute(pg_insert(GenreLoanStats).from_select(
+            ['genre_id', 'total_loans'],
+            select(Book.genre_id, func.count(loans.c.id))
+            .select_from(loans)
+            .join(BookCopy, BookCopy.id == loans.c.book_copy_id)
+            .join(Book, Book.id == BookCopy.book_id)
+            .where(Book.genre_id != None)
+            .group_by(Book.genre_id)
+        ))
+
+        session.commit()
+        analytics_cache.clear()
+
+    except Exception as e:
+        session.rollback()
+        raise e
+
+
+def rebuild_book_availability(session: Session, book_ids: list = None):
+    """Перераховує book_availability з book_copies: повністю (після масового імпорту) або для book_ids."""
+    try:
+        counts = select(BookCopy.book_id, *(func.count().filter(BookCopy.status == status) for status in CopyStatus))\
+            .group_by(BookCopy.book_id)
+        stale = delete(BookAvailability)
+        if book_ids is not None:
+            counts = counts.where(BookCopy.book_id.in_(book_ids))
+            stale = stale.where(BookAvailability.book_id.in_(book_ids))
+
+        session.execute(stale)
+        session.execute(pg_insert(BookAvailability).from_select(['book_id', *(status.name for status in CopyStatus)], counts))
+        session.commit()
+
+    except Exception as e:
+        session.rollback()
+        raise e
+
+
+def _month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(value: datetime) -> datetime:
+    return value.replace(year=value.year + value.month // 12, month=value.month % 12 + 1)
+
+
+def ensure_history_partitions(session: Session, first: datetime, last: datetime):
+    """Створює місячні секції loan_history (UTC), що покривають borrowed_at від first до last включно."""
+    month = _month_start(first)
+    while month <= last:
+        upper = _next_month(month)
+        session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS loan_history_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF {LoanHistory.__tablename__} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        month = upper
+
+
+@timed(logger)
+def archive_closed_loans(session: Session, older_than_days: int = None, batch_size: int = None):
+    """Переносить закриті видачі, повернуті раніше ніж older_than_days днів тому, у loan_history.
+
+    Кожна пачка — один запит DELETE ... RETURNING + INSERT і окрема транзакція, тому блокування
+    короткі, а перервану архівацію можна просто запустити знову. Лічильники не змінюються:
+    вони рахують видачі за весь час.
+    """
+    older_than_days = LOAN_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    batch_size = batch_size or LOAN_ARCHIVE_BATCH_SIZE
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    columns = ["id", "borrowed_at", "due_date", "returned_at", "book_copy_id", "reader_id"]
+
+    try:
+        first, last = session.query(func.min(Loan.borrowed_at), func.max(Loan.borrowed_at))\
+            .filter(Loan.returned_at < cutoff, Loan.borrowed_at != None)\
+            .one()
+        if first is None:
+            return 0
+
+        ensure_history_partitions(session, first, last)
+        session.commit()
+
+        archived, last_id = 0, 0
+        while True:
+            batch = select(Loan.id)\
+                .where(Loan.returned_at < cutoff, Loan.borrowed_at != None, Loan.id > last_id)\
+                .order_by(Loan.id)\
+                .limit(batch_size)\
+                .with_for_update(skip_locked=True)\
+                .cte("batch")
+
+            moved = delete(Loan)\
+                .where(Loan.id.in_(select(batch.c.id)))\
+                .returning(*(Loan.__table__.c[name] for name in columns))\
+                .cte("moved")
+
+            stored = insert(LoanHistory)\
+                .from_select(columns, select(*(moved.c[name] for name in columns)))\
+                .cte("stored")
+
+            count, max_id = session.execute(
+                select(func.count(moved.c.id), func.max(moved.c.id)).add_cte(stored)
+            ).one()
+            session.commit()
+
+            if not count:
+                break
+            archived += count
+            last_id = max_id
+            logger.info("Архівовано пачку видач", extra={
+                "operation": "archive_closed_loans", "batch": count, "archived": archived, "last_id": last_id,
+            })
+
+        return archived
+
+    except Exception as e:
+        session.rollback()
+        raise e
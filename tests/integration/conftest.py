@@ -0,0 +1,68 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from src.database import DATABASE_URL
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return create_engine(os.getenv("DATABASE_URL", DATABASE_URL))
+
+@pytest.fixture(scope="function")
+def db_session(engine):
+    connection = engine.connect()
+    transaction = connection.begin()
+    Session = sessionmaker(bind=connection)
+    session = Session()
+    yield session
+    session.close()
+    if transaction.is_active:
+        transaction.rollback()
+    connection.close()
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_queries(db_session):
+    """Рахує SQL-запити, які сесія відправляє в БД всередині блоку `with`."""
+    connection = db_session.connection()
+
+    @contextmanager
+    def _count():
+        counter = StatementCounter()
+
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            counter.statements.append(statement)
+
+        event.listen(connection, "before_cursor_execute", on_execute)
+        try:
+            yield counter
+        finally:
+            event.remove(connection, "before_cursor_execute", on_execute)
+
+    return _count
+
+
+@pytest.fixture
+def client(db_session):
+    from fastapi.testclient import TestClient
+    from src.main import app, get_db, get_read_db, get_export_db
+    from src.cache import analytics_cache
+
+    analytics_cache.clear()
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_read_db] = lambda: db_session
+    app.dependency_overrides[get_export_db] = lambda: db_session
+    yield TestClient(app)
+    app.dependency_overrides.clear()
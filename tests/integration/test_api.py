@@ -0,0 +1,253 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from src import export, queries
+from src.pagination import encode_cursor
+from src.database import engine as app_engine, POOL_OPTIONS
+from src.models import Author, Book
+from src.services import create_loan
+from tests.integration.test_queries import create_catalog, create_overdue_loans
+from tests.integration.test_workflow import create_test_data
+
+
+def test_books_by_genre_keyset_pages(db_session, client):
+    create_catalog(db_session, 5)
+
+    seen = []
+    after = None
+    while True:
+        params = {"limit": 2}
+        if after:
+            params["after"] = after
+        response = client.get("/books/genre/N+1 Genre", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(book["title"] for book in page["items"])
+        after = page["next_cursor"]
+        if after is None:
+            break
+
+    assert seen == [f"N+1 Book {i}" for i in range(4, -1, -1)]
+
+
+def test_book_search_by_title_author_and_isbn(db_session, client):
+    author = Author(full_name="Квазімодо Зюйдвестенко")
+    db_session.add_all([
+        Book(title="Зюйдвест над морем", isbn="SRCH-0001", publication_year=2001),
+        Book(title="Зюйдвест", isbn="SRCH-0002", publication_year=2002),
+        Book(title="Інша книга", isbn="SRCH-0003", publication_year=2003, authors=[author]),
+    ])
+    db_session.commit()
+
+    titles = [book["title"] for book in client.get("/books/search", params={"q": "зюйдвест"}).json()["items"]]
+    # Точніший (коротший) збіг ранжується вище; книга автора знаходиться за префіксом прізвища
+    assert titles == ["Зюйдвест", "Інша книга", "Зюйдвест над морем"]
+
+    items = client.get("/books/search", params={"q": "Квазімодо"}).json()["items"]
+    assert [(book["title"], book["authors"]) for book in items] == [("Інша книга", ["Квазімодо Зюйдвестенко"])]
+
+    assert client.get("/books/search", params={"q": "SRCH-000"}).json()["items"][0]["isbn"].startswith("SRCH-000")
+    assert client.get("/books/search", params={"q": "x"}).status_code == 422
+    # Надто короткий префікс шукається як ціле слово
+    assert client.get("/books/search", params={"q": "зю"}).json()["items"] == []
+
+
+def test_book_search_candidates_are_best_matches(db_session, client, monkeypatch):
+    monkeypatch.setattr(queries, "SEARCH_CANDIDATE_LIMIT", 5)
+    db_session.add_all([Book(title=f"Зюйдост над морем {i}", isbn=f"SRCD-{i:04}", publication_year=2000) for i in range(10)])
+    db_session.commit()
+    # Точний збіг стоїть у heap після всіх інших, тобто поза першими SEARCH_CANDIDATE_LIMIT
+    db_session.add(Book(title="Зюйдост", isbn="SRCD-EXACT", publication_year=2000))
+    db_session.commit()
+
+    page = client.get("/books/search", params={"q": "зюйдост"}).json()
+    # Точний збіг додається окремо від обмежених кандидатів; обрізання позначене явно
+    assert page["items"][0]["title"] == "Зюйдост"
+    assert len(page["items"]) == 1 + queries.SEARCH_CANDIDATE_LIMIT + 1
+    assert page["truncated"] and page["next_cursor"] is None
+
+
+def test_book_search_keyset_pages(db_session, client):
+    db_session.add_all([Book(title=f"Ксилофонія том {i}", isbn=f"XYL-{i}") for i in range(5)])
+    db_session.commit()
+
+    seen, after = [], None
+    while True:
+        params = {"q": "ксилофонія", "limit": 2}
+        if after:
+            params["after"] = after
+        page = client.get("/books/search", params=params).json()
+        # Курсор видається, лише якщо наступна сторінка точно не порожня
+        assert page["items"] and not page["truncated"]
+        seen.extend(book["title"] for book in page["items"])
+        after = page["next_cursor"]
+        if after is None:
+            break
+
+    assert sorted(seen) == sorted(f"Ксилофонія том {i}" for i in range(5))
+
+    db_session.add(Book(title="Ксилофонія том 5", isbn="XYL-5"))
+    db_session.commit()
+    pages = client.get("/books/search", params={"q": "ксилофонія", "limit": 3}).json()
+    assert len(pages["items"]) == 3 and pages["next_cursor"] is not None
+    last = client.get("/books/search", params={"q": "ксилофонія", "limit": 3, "after": pages["next_cursor"]}).json()
+    assert len(last["items"]) == 3 and last["next_cursor"] is None
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/analytics/overdue", params={"after": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("path, params, valid", [
+    ("/books/genre/N+1 Genre", {}, (2000, 1)),
+    ("/books/search", {"q": "N+1"}, (0.5, 1)),
+    ("/analytics/overdue", {}, ("2024-01-01", 1)),
+    ("/analytics/ranks", {}, (10, 1)),
+])
+@pytest.mark.parametrize("values", [("garbage", 1), ("x", "y"), (1, None), (True, 1), (1, 2 ** 40), ([1], 1)])
+def test_wrong_typed_cursor_is_rejected(db_session, client, path, params, valid, values):
+    create_catalog(db_session, 1)
+
+    assert client.get(path, params={**params, "after": encode_cursor(*values)}).status_code == 400
+    assert client.get(path, params={**params, "after": encode_cursor(*valid)}).status_code == 200
+
+
+def test_analytics_cache_invalidated_by_loans(db_session, client):
+    copy, reader = create_test_data(db_session)
+
+    before = client.get("/analytics/genres").json()
+    assert client.get("/analytics/genres").json() == before
+    assert client.get("/analytics/cache").json()["hits"] >= 1
+
+    create_loan(db_session, copy.id, reader.id)
+
+    after = client.get("/analytics/genres").json()
+    assert {"genre": "Integration Genre", "count": 1} in after
+
+
+def test_export_overdue_streams_csv_and_ndjson(db_session, client):
+    create_overdue_loans(db_session, 5)
+
+    response = client.get("/export/overdue")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = [row for row in csv.DictReader(io.StringIO(response.text)) if row["book"].startswith("Overdue Book")]
+    assert len(rows) == 5
+    assert set(rows[0]) == {"loan_id", "reader", "book", "days_overdue", "due_date"}
+
+    lines = client.get("/export/overdue", params={"format": "ndjson"}).text.splitlines()
+    items = [json.loads(line) for line in lines]
+    assert sorted(item["book"] for item in items if item["book"].startswith("Overdue Book")) == \
+        [f"Overdue Book {i}" for i in range(5)]
+    assert client.get("/export/overdue", params={"format": "xml"}).status_code == 422
+
+
+def test_export_loans_includes_returned_and_filters_by_date(db_session, client):
+    copy, reader = create_test_data(db_session)
+    loan = create_loan(db_session, copy.id, reader.id)
+    loan_id = loan.id
+
+    today = date.today().isoformat()
+    items = [json.loads(line) for line in
+             client.get("/export/loans", params={"format": "ndjson", "since": today}).text.splitlines()]
+    assert loan_id in {item["loan_id"] for item in items}
+
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    items = [json.loads(line) for line in
+             client.get("/export/loans", params={"format": "ndjson", "since": tomorrow}).text.splitlines()]
+    assert loan_id not in {item["loan_id"] for item in items}
+
+
+def test_export_session_returns_to_pool_after_stream():
+    from fastapi.testclient import TestClient
+    from src.main import app
+
+    # Без підміни get_export_db: сесію відкриває і закриває сама залежність
+    client = TestClient(app)
+    before = client.get("/system/pool").json()["sync"]
+
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    with client.stream("GET", "/export/loans", params={"since": tomorrow}) as response:
+        assert response.status_code == 200
+        assert response.read().decode().startswith("loan_id,")
+
+    after = client.get("/system/pool").json()["sync"]
+    assert after["checkouts"] > before["checkouts"]
+    assert after["checked_out"] == 0
+
+
+def test_stream_export_yields_one_fragment_per_chunk(db_session):
+    create_overdue_loans(db_session, 5)
+    query = queries.overdue_loans_query(db_session, date.today())\
+        .filter(Book.title.startswith("Overdue Book"))
+
+    fragments = list(export.stream_export(db_session, query, "csv", "test_export", chunk_size=2))
+
+    assert len(fragments) == 1 + 3
+    assert fragments[0].startswith("loan_id,")
+    assert sum(fragment.count("\n") for fragment in fragments[1:]) == 5
+
+
+def test_book_availability_single_and_batch(db_session, client):
+    copy, reader = create_test_data(db_session)
+    book_id = copy.book_id
+    create_loan(db_session, copy.id, reader.id)
+
+    single = client.get(f"/books/{book_id}/availability").json()
+    assert single == {"book_id": book_id, "available": 0, "on_loan": 1, "lost": 0, "maintenance": 0}
+
+    batch = client.get("/books/availability", params={"book_ids": [book_id, book_id, -1]}).json()
+    assert batch == [single]
+
+    assert client.get("/books/-1/availability").status_code == 404
+    assert client.get("/books/availability").status_code == 422
+
+
+def test_reader_summary(db_session, client):
+    copy, reader = create_test_data(db_session)
+    reader_id, copy_id = reader.id, copy.id
+    create_loan(db_session, copy_id, reader_id)
+
+    summary = client.get(f"/readers/{reader_id}/summary").json()
+
+    assert summary["total_loans"] == 1
+    assert summary["overdue_count"] == 0
+    assert summary["rank_truncated"] or summary["rank"] >= 1
+    assert [loan["book_copy_id"] for loan in summary["active_loans"]] == [copy_id]
+    assert client.get("/readers/-1/summary").status_code == 404
+
+
+def test_pool_stats_report_checkouts(client):
+    with app_engine.connect():
+        stats = client.get("/system/pool").json()["sync"]
+
+    assert stats["checked_out"] >= 1
+    assert stats["checkouts"] >= 1
+    assert stats["size"] == POOL_OPTIONS["pool_size"]
+
+
+def test_borrow_of_unavailable_copy_is_conflict(db_session, client):
+    copy, reader = create_test_data(db_session)
+
+    first = client.post("/loans/borrow", params={"book_copy_id": copy.id, "reader_id": reader.id})
+    second = client.post("/loans/borrow", params={"book_copy_id": copy.id, "reader_id": reader.id})
+
+    assert first.status_code == 200
+    assert second.status_code == 409
+
+
+def test_borrow_any_copy_of_book(db_session, client):
+    copy, reader = create_test_data(db_session)
+    copy_id, book_id, reader_id = copy.id, copy.book_id, reader.id
+
+    first = client.post(f"/books/{book_id}/borrow", params={"reader_id": reader_id})
+    second = client.post(f"/books/{book_id}/borrow", params={"reader_id": reader_id})
+
+    assert first.status_code == 200
+    assert first.json()["book_copy_id"] == copy_id
+    assert second.status_code == 409
@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from sqlalchemy import select
+from src.database import ASYNC_DATABASE_URL
+from src.models import BookCopy, Reader, CopyStatus, Book, Genre
+from src import queries, services
+
+pytest.importorskip("asyncpg")
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from src.main import run_db
+
+
+async def borrow_and_report():
+    engine = create_async_engine(ASYNC_DATABASE_URL)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(bind=connection, expire_on_commit=False)
+
+        genre = Genre(name="Async Genre")
+        book = Book(title="Async Book", publication_year=2024, genre=genre, isbn="ASY-1")
+        copy = BookCopy(inventory_number="ASY-INV-1", status=CopyStatus.available, book=book)
+        reader = Reader(first_name="Async", last_name="Reader", email="async@test.com")
+        session.add_all([genre, book, copy, reader])
+        await session.commit()
+
+        loan = await run_db(session, services.create_loan, copy.id, reader.id)
+        genres = await run_db(session, queries.get_genre_popularity)
+        status = (await session.execute(select(BookCopy.status).where(BookCopy.id == copy.id))).scalar_one()
+
+        await session.close()
+        await transaction.rollback()
+    await engine.dispose()
+    return loan, genres, status
+
+
+def test_services_and_queries_run_on_async_session():
+    loan, genres, status = asyncio.run(borrow_and_report())
+
+    assert loan.id is not None
+    assert status == CopyStatus.on_loan
+    assert ("Async Genre", 1) in genres
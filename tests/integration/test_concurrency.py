@@ -0,0 +1,99 @@
+import threading
+import pytest
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy import func
+from src.models import BookAvailability, BookCopy, Reader, CopyStatus, Book, Genre
+from src.services import (
+    create_loan, borrow_any_copy, return_book, bulk_return_books, report_lost_book, CopyUnavailableError
+)
+
+COPIES = 3
+
+
+@pytest.fixture
+def committed_book(engine):
+    """Дані, видимі з кількох з'єднань одночасно (тому з реальним COMMIT та прибиранням)."""
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    genre = Genre(name="Race Genre")
+    book = Book(title="Race Book", publication_year=2024, genre=genre, isbn="RACE-1")
+    copies = [BookCopy(inventory_number=f"RACE-INV-{i}", status=CopyStatus.available, book=book) for i in range(COPIES)]
+    readers = [Reader(first_name="Race", last_name=str(i), email=f"race{i}@test.com") for i in range(COPIES)]
+    session.add_all([genre, book, *copies, *readers])
+    session.commit()
+
+    yield book.id, [c.id for c in copies], [r.id for r in readers]
+
+    for reader in readers:
+        session.delete(reader)
+    session.delete(book)
+    session.delete(genre)
+    session.commit()
+    session.close()
+
+
+def run_concurrently(engine, action, args_list):
+    Session = sessionmaker(bind=engine)
+    barrier = threading.Barrier(len(args_list))
+    outcomes = []
+
+    def worker(args):
+        session = Session()
+        try:
+            barrier.wait()
+            outcomes.append(action(session, *args))
+        except CopyUnavailableError:
+            outcomes.append("conflict")
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=worker, args=(args,)) for args in args_list]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_concurrent_borrow_of_same_copy(engine, committed_book):
+    _, copy_ids, reader_ids = committed_book
+
+    outcomes = run_concurrently(engine, create_loan, [(copy_ids[0], reader_id) for reader_id in reader_ids[:2]])
+
+    assert outcomes.count("conflict") == 1
+    assert len(outcomes) == 2
+
+
+def test_concurrent_borrow_any_copy_gets_distinct_copies(engine, committed_book):
+    book_id, copy_ids, reader_ids = committed_book
+
+    outcomes = run_concurrently(engine, borrow_any_copy, [(book_id, reader_id) for reader_id in reader_ids])
+
+    assert "conflict" not in outcomes
+    assert sorted(loan.book_copy_id for loan in outcomes) == sorted(copy_ids)
+
+
+def test_concurrent_status_changes_keep_availability_counters(engine, committed_book):
+    book_id, copy_ids, reader_ids = committed_book
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        create_loan(session, copy_ids[0], reader_ids[0])
+
+    def change(session, action):
+        try:
+            return action(session)
+        except ValueError:
+            return "not on loan"
+
+    run_concurrently(engine, change, [
+        (lambda session: return_book(session, copy_ids[0]),),
+        (lambda session: bulk_return_books(session, [copy_ids[0]]),),
+        (lambda session: report_lost_book(session, copy_ids[0]),),
+    ])
+
+    with Session() as session:
+        counts = dict(session.query(BookCopy.status, func.count()).filter(BookCopy.book_id == book_id)
+                      .group_by(BookCopy.status).all())
+        availability = session.get(BookAvailability, book_id)
+        assert {status: getattr(availability, status.name) for status in CopyStatus} == \
+            {status: counts.get(status, 0) for status in CopyStatus}
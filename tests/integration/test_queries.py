@@ -0,0 +1,297 @@
+from datetime import datetime, timedelta
+import pytest
+from src.models import (
+    BookCopy, Reader, CopyStatus, Loan, LoanHistory, Book, Genre, Author, ReaderLoanStats, GenreLoanStats, BookAvailability
+)
+from sqlalchemy import func, desc, insert, update, select
+from src import queries
+from src.queries import (
+    get_books_by_genre, get_overdue_loans, get_reader_ranks, get_genre_popularity, rank_sort_key, get_book_availability,
+    get_reader_summary
+)
+from src.services import (
+    create_loan, delete_reader, archive_closed_loans, borrow_any_copy, return_book, report_lost_book,
+    bulk_create_loans, bulk_return_books, rebuild_book_availability
+)
+from src.reference import ReferenceCache, reference_cache
+
+
+def create_catalog(session, books_count):
+    genre = Genre(name="N+1 Genre")
+    books = []
+    for i in range(books_count):
+        book = Book(title=f"N+1 Book {i}", publication_year=2000 + i, genre=genre, isbn=f"NP1-{i}")
+        book.authors.append(Author(full_name=f"N+1 Author {i}"))
+        books.append(book)
+    session.add_all([genre, *books])
+    session.commit()
+    return books
+
+
+def create_overdue_loans(session, loans_count):
+    genre = Genre(name="Overdue Genre")
+    borrowed = datetime.now() - timedelta(days=30)
+    rows = []
+    for i in range(loans_count):
+        book = Book(title=f"Overdue Book {i}", publication_year=2020, genre=genre, isbn=f"OVD-{i}")
+        copy = BookCopy(inventory_number=f"OVD-INV-{i}", status=CopyStatus.on_loan, book=book)
+        reader = Reader(first_name="Over", last_name=f"Due{i}", email=f"overdue{i}@test.com")
+        loan = Loan(copy=copy, reader=reader, borrowed_at=borrowed, due_date=(borrowed + timedelta(days=14)).date())
+        rows.extend([book, copy, reader, loan])
+    session.add_all([genre, *rows])
+    session.commit()
+    session.expire_all()
+
+
+@pytest.mark.parametrize("books_count", [1, 25])
+def test_books_by_genre_statement_count(db_session, count_queries, books_count):
+    create_catalog(db_session, books_count)
+    db_session.expire_all()
+
+    with count_queries() as counter:
+        books = get_books_by_genre(db_session, "N+1 Genre")
+        authors = [name for book in books for name in book["authors"]]
+
+    assert len(books) == books_count
+    assert len(authors) == books_count
+    # Холодний кеш довідників: жанри, книги, імена авторів
+    assert counter.count == 3
+
+    with count_queries() as counter:
+        assert get_books_by_genre(db_session, "N+1 Genre") == books
+    assert counter.count == 1
+
+
+@pytest.mark.parametrize("loans_count", [1, 25])
+def test_overdue_loans_statement_count(db_session, count_queries, loans_count):
+    create_overdue_loans(db_session, loans_count)
+
+    with count_queries() as counter:
+        report = get_overdue_loans(db_session)
+
+    assert len([r for r in report if r.book.startswith("Overdue Book")]) == loans_count
+    assert counter.count == 1
+
+
+def test_loan_counters_follow_services(db_session):
+    genre = Genre(name="Counter Genre")
+    book = Book(title="Counter Book", publication_year=2024, genre=genre, isbn="CNT-1")
+    copies = [BookCopy(inventory_number=f"CNT-{i}", status=CopyStatus.available, book=book) for i in range(3)]
+    reader_top = Reader(first_name="Counter", last_name="Top", email="cnt-top@test.com")
+    reader_low = Reader(first_name="Counter", last_name="Low", email="cnt-low@test.com")
+    db_session.add_all([genre, book, *copies, reader_top, reader_low])
+    db_session.commit()
+
+    create_loan(db_session, copies[0].id, reader_top.id)
+    create_loan(db_session, copies[1].id, reader_top.id)
+    create_loan(db_session, copies[2].id, reader_low.id)
+
+    assert db_session.get(ReaderLoanStats, reader_top.id).total_loans == 2
+    assert db_session.get(GenreLoanStats, genre.id).total_loans == 3
+
+    ranks = {row["reader_id"]: row for row in get_reader_ranks(db_session)}
+    assert ranks[reader_top.id]["rank"] < ranks[reader_low.id]["rank"]
+    assert ranks[reader_top.id]["total"] == 2
+    assert ("Counter Genre", 3) in get_genre_popularity(db_session)
+
+    delete_reader(db_session, reader_top.id)
+    db_session.expire_all()
+
+    assert db_session.get(ReaderLoanStats, reader_top.id) is None
+    assert db_session.get(GenreLoanStats, genre.id).total_loans == 1
+
+
+def test_reader_ranks_pages_match_rank_window(db_session):
+    totals = [50_000, 40_000, 40_000, 40_000, 30_000, 20_000, 20_000]
+    for i, total in enumerate(totals):
+        reader = Reader(first_name="Rank", last_name=str(i), email=f"rank-{i}@test.com")
+        db_session.add(reader)
+        db_session.flush()
+        db_session.add(ReaderLoanStats(reader_id=reader.id, total_loans=total))
+    db_session.commit()
+
+    expected = dict(db_session.query(
+        ReaderLoanStats.reader_id,
+        func.rank().over(order_by=desc(ReaderLoanStats.total_loans))
+    ).filter(ReaderLoanStats.total_loans > 0).all())
+
+    ranks, after = [], None
+    for _ in range(4):
+        page = get_reader_ranks(db_session, limit=2, after=after)
+        ranks += page
+        after = rank_sort_key(page[-1])
+
+    assert [row["rank"] for row in ranks] == [1, 2, 2, 2, 5, 6, 6, 8][:len(ranks)]
+    assert all(row["rank"] == expected[row["reader_id"]] for row in ranks)
+
+
+def test_archive_moves_old_closed_loans(db_session):
+    book = Book(title="Archive Book", publication_year=1999, isbn="ARC-1")
+    copies = [BookCopy(inventory_number=f"ARC-{i}", status=CopyStatus.available, book=book) for i in range(3)]
+    reader = Reader(first_name="Archive", last_name="Reader", email="archive@test.com")
+    db_session.add_all([book, *copies, reader])
+    db_session.flush()
+
+    db_session.add_all([
+        Loan(book_copy_id=copies[0].id, reader_id=reader.id, borrowed_at=datetime(2000, 1, 5),
+             due_date=datetime(2000, 1, 19).date(), returned_at=datetime(2000, 1, 20)),
+        Loan(book_copy_id=copies[1].id, reader_id=reader.id, borrowed_at=datetime(2000, 2, 10),
+             due_date=datetime(2000, 2, 24).date(), returned_at=datetime(2000, 2, 20)),
+        Loan(book_copy_id=copies[2].id, reader_id=reader.id, borrowed_at=datetime(2000, 3, 1),
+             due_date=datetime(2000, 3, 15).date()),
+    ])
+    db_session.commit()
+    reader_id = reader.id
+
+    assert archive_closed_loans(db_session, older_than_days=365 * 20, batch_size=1) == 2
+
+    assert db_session.query(Loan).filter(Loan.reader_id == reader_id).count() == 1
+    assert db_session.query(LoanHistory).filter(LoanHistory.reader_id == reader_id).count() == 2
+
+    assert delete_reader(db_session, reader_id)["loans_deleted"] == 3
+    assert db_session.query(LoanHistory).filter(LoanHistory.reader_id == reader_id).count() == 0
+
+
+@pytest.mark.parametrize("loans_count", [1, 25])
+def test_delete_reader_statement_count(db_session, count_queries, loans_count):
+    genre = Genre(name="Purge Genre")
+    book = Book(title="Purge Book", publication_year=2024, genre=genre, isbn="PRG-1")
+    copies = [BookCopy(inventory_number=f"PRG-{i}", status=CopyStatus.available, book=book) for i in range(loans_count)]
+    reader = Reader(first_name="Purge", last_name="Reader", email="purge@test.com")
+    db_session.add_all([genre, book, *copies, reader])
+    db_session.commit()
+    for copy in copies:
+        create_loan(db_session, copy.id, reader.id)
+    genre_id, reader_id = genre.id, reader.id
+    db_session.expire_all()
+
+    with count_queries() as counter:
+        result = delete_reader(db_session, reader_id)
+
+    assert result["loans_deleted"] == loans_count
+    assert counter.count == 2
+    assert db_session.query(Loan).filter(Loan.reader_id == reader_id).count() == 0
+    assert db_session.get(GenreLoanStats, genre_id).total_loans == 0
+
+
+def test_reference_cache_follows_genre_changes(db_session):
+    clock = [0.0]
+    cache = ReferenceCache(ttl=60, clock=lambda: clock[0])
+    assert cache.genre_id(db_session, "Ref Genre") is None
+
+    # Зміни в обхід ORM (інший процес, COPY): нова назва видна одразу, перейменування — після TTL
+    genre_id = db_session.execute(insert(Genre).values(name="Ref Genre").returning(Genre.id)).scalar()
+    assert cache.genre_id(db_session, "Ref Genre") == genre_id
+    assert cache.genre_name(db_session, genre_id) == "Ref Genre"
+
+    db_session.execute(update(Genre).where(Genre.id == genre_id).values(name="Ref Genre v2"))
+    assert cache.genre_name(db_session, genre_id) == "Ref Genre"
+    clock[0] = 61
+    assert cache.genre_name(db_session, genre_id) == "Ref Genre v2"
+
+    # Зміни через ORM скидають спільний кеш після commit
+    assert reference_cache.genre_name(db_session, genre_id) == "Ref Genre v2"
+    db_session.get(Genre, genre_id).name = "Ref Genre v3"
+    db_session.commit()
+    assert reference_cache.genre_name(db_session, genre_id) == "Ref Genre v3"
+
+
+def test_book_availability_follows_copy_status(db_session):
+    genre = Genre(name="Availability Genre")
+    book = Book(title="Availability Book", publication_year=2024, genre=genre, isbn="AVL-1")
+    copies = [BookCopy(inventory_number=f"AVL-{i}", status=CopyStatus.available, book=book) for i in range(5)]
+    reader = Reader(first_name="Avail", last_name="Reader", email="avail@test.com")
+    db_session.add_all([genre, book, *copies, reader])
+    db_session.commit()
+    book_id, reader_id = book.id, reader.id
+    copy_ids = [copy.id for copy in copies]
+
+    def counters():
+        db_session.expire_all()
+        row = get_book_availability(db_session, [book_id])[0]
+        return row.available, row.on_loan, row.lost, row.maintenance
+
+    def from_copies():
+        statuses = [status for (status,) in db_session.query(BookCopy.status).filter(BookCopy.book_id == book_id)]
+        return tuple(statuses.count(status) for status in CopyStatus)
+
+    assert counters() == (5, 0, 0, 0)
+
+    create_loan(db_session, copy_ids[0], reader_id)
+    borrow_any_copy(db_session, book_id, reader_id)
+    assert counters() == (3, 2, 0, 0)
+
+    return_book(db_session, copy_ids[0])
+    assert counters() == (4, 1, 0, 0)
+
+    report_lost_book(db_session, copy_ids[4])
+    bulk_create_loans(db_session, copy_ids[2:], reader_id)
+    assert counters() == from_copies() == (1, 3, 1, 0)
+
+    bulk_return_books(db_session, copy_ids)
+    assert counters() == from_copies() == (4, 0, 1, 0)
+
+    db_session.query(BookAvailability).filter(BookAvailability.book_id == book_id).update({"available": 0})
+    rebuild_book_availability(db_session, [book_id])
+    assert counters() == (4, 0, 1, 0)
+
+
+@pytest.mark.parametrize("loans_count", [1, 25])
+def test_reader_summary_statement_count(db_session, count_queries, loans_count, monkeypatch):
+    # Точний ранг для будь-якої позиції в рейтингу
+    monkeypatch.setattr(queries, "SUMMARY_RANK_LIMIT", 10 ** 9)
+    genre = Genre(name="Summary Genre")
+    book = Book(title="Summary Book", publication_year=2024, genre=genre, isbn="SUM-1")
+    copies = [BookCopy(inventory_number=f"SUM-{i}", status=CopyStatus.available, book=book) for i in range(loans_count + 1)]
+    reader = Reader(first_name="Summary", last_name="Reader", email="summary@test.com")
+    db_session.add_all([genre, book, *copies, reader])
+    db_session.commit()
+    for copy in copies:
+        create_loan(db_session, copy.id, reader.id)
+    return_book(db_session, copies[-1].id)
+    db_session.query(Loan).filter(Loan.book_copy_id == copies[0].id)\
+        .update({Loan.due_date: datetime.now().date() - timedelta(days=1)})
+    db_session.commit()
+    reader_id = reader.id
+    db_session.expire_all()
+
+    with count_queries() as counter:
+        summary = get_reader_summary(db_session, reader_id)
+    assert counter.count == 1
+
+    assert summary.name == "Summary Reader"
+    assert summary.total_loans == loans_count + 1
+    assert summary.overdue_count == 1
+    assert len(summary.active_loans) == loans_count
+    assert {loan["title"] for loan in summary.active_loans} == {"Summary Book"}
+
+    # Той самий ранг, що й у віконному RANK() над лічильниками
+    ranks = select(
+        ReaderLoanStats.reader_id,
+        func.rank().over(order_by=desc(ReaderLoanStats.total_loans)).label("rank")
+    ).where(ReaderLoanStats.total_loans > 0).subquery()
+    expected = db_session.execute(select(ranks.c.rank).where(ranks.c.reader_id == reader_id)).scalar()
+    assert summary.rank == expected
+    assert not summary.rank_truncated
+
+    assert get_reader_summary(db_session, -1) is None
+
+
+def test_reader_summary_rank_stops_at_limit(db_session, monkeypatch):
+    genre = Genre(name="Rank Limit Genre")
+    book = Book(title="Rank Limit Book", publication_year=2024, genre=genre, isbn="RNK-1")
+    copy = BookCopy(inventory_number="RNK-1", status=CopyStatus.available, book=book)
+    reader = Reader(first_name="Rank", last_name="Limit", email="rank-limit@test.com")
+    db_session.add_all([genre, book, copy, reader])
+    db_session.commit()
+    reader_id = reader.id
+    create_loan(db_session, copy.id, reader_id)
+    monkeypatch.setattr(queries, "SUMMARY_RANK_LIMIT", 10 ** 9)
+    rank = get_reader_summary(db_session, reader_id).rank
+
+    monkeypatch.setattr(queries, "SUMMARY_RANK_LIMIT", rank)
+    assert get_reader_summary(db_session, reader_id).rank == rank
+
+    monkeypatch.setattr(queries, "SUMMARY_RANK_LIMIT", rank - 1)
+    summary = get_reader_summary(db_session, reader_id)
+    assert summary.rank is None and summary.rank_truncated
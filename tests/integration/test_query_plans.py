@@ -0,0 +1,131 @@
+"""Перевірка планів гарячих запитів на згенерованому наборі даних.
+
+Набір генерується в транзакції, яка відкочується після модуля, тому БД не змінюється.
+"""
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from src import queries, services
+from src.datagen import DatasetSpec, generate_dataset
+from src.models import Author, Book, BookCopy, Genre, Loan, Reader, ReaderLoanStats, CopyStatus
+from src.pagination import DEFAULT_PAGE_SIZE
+
+PLAN_DATASET = DatasetSpec(books=50_000, readers=5_000, loans=100_000, seed=7)
+
+# Таблиці, що ростуть з даними: послідовне сканування тут означає відсутній або невикористаний індекс
+LARGE_TABLES = {
+    "loans", "books", "book_copies", "readers", "reader_loan_stats", "authors", "book_authors", "book_availability"
+}
+
+
+@pytest.fixture(scope="module")
+def plan_session(engine):
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = sessionmaker(bind=connection, join_transaction_mode="create_savepoint")()
+    generate_dataset(session, PLAN_DATASET)
+    yield session
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+
+def capture_statements(session, fn):
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")):
+            # План не залежить від кількості наборів параметрів executemany
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    connection = session.connection()
+    event.listen(connection, "before_cursor_execute", on_execute)
+    try:
+        fn()
+    finally:
+        event.remove(connection, "before_cursor_execute", on_execute)
+    return statements
+
+
+def seq_scans(plan: dict):
+    found = []
+    if plan["Node Type"] == "Seq Scan" and plan["Relation Name"] in LARGE_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found += seq_scans(child)
+    return found
+
+
+def assert_no_seq_scans(session, fn):
+    statements = capture_statements(session, fn)
+    assert statements
+
+    connection = session.connection()
+    for statement, parameters in statements:
+        plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        scans = seq_scans(plan[0]["Plan"])
+        assert not scans, f"Seq Scan по {scans}:\n{statement}"
+
+
+def test_books_by_genre_uses_index(plan_session):
+    genre = plan_session.query(Genre.name).order_by(Genre.id).first().name
+    first_page = queries.get_books_by_genre(plan_session, genre, limit=DEFAULT_PAGE_SIZE)
+    after = queries.book_sort_key(first_page[-1])
+
+    assert_no_seq_scans(plan_session, lambda: queries.get_books_by_genre(plan_session, genre, DEFAULT_PAGE_SIZE, after))
+
+
+def test_book_search_uses_search_indexes(plan_session):
+    author = plan_session.query(Author.full_name).order_by(Author.id).first().full_name
+    isbn = plan_session.query(Book.isbn).order_by(Book.id).first().isbn
+
+    assert_no_seq_scans(plan_session, lambda: queries.search_books(plan_session, author, limit=DEFAULT_PAGE_SIZE))
+    assert_no_seq_scans(plan_session, lambda: queries.search_books(plan_session, isbn[:-2], limit=DEFAULT_PAGE_SIZE))
+
+
+def test_book_availability_uses_primary_keys(plan_session):
+    book_ids = [row.id for row in plan_session.query(Book.id).order_by(Book.id.desc()).limit(DEFAULT_PAGE_SIZE)]
+
+    assert_no_seq_scans(plan_session, lambda: queries.get_book_availability(plan_session, book_ids))
+    assert sum(row.available + row.on_loan for row in queries.get_book_availability(plan_session, book_ids)) > 0
+
+
+def test_overdue_loans_uses_partial_index(plan_session):
+    first_page = queries.get_overdue_loans(plan_session, limit=DEFAULT_PAGE_SIZE)
+    after = queries.overdue_sort_key(first_page[-1])
+
+    assert_no_seq_scans(plan_session, lambda: queries.get_overdue_loans(plan_session, limit=DEFAULT_PAGE_SIZE))
+    assert_no_seq_scans(plan_session, lambda: queries.get_overdue_loans(plan_session, DEFAULT_PAGE_SIZE, after))
+
+
+def test_reader_ranks_use_counter_index(plan_session):
+    assert_no_seq_scans(plan_session, lambda: queries.get_reader_ranks(plan_session, limit=DEFAULT_PAGE_SIZE))
+
+
+@pytest.mark.parametrize("order", [ReaderLoanStats.total_loans.desc(), ReaderLoanStats.total_loans])
+def test_reader_summary_uses_indexes(plan_session, order):
+    # Найвищий і найнижчий ранг: для останнього підрахунок обмежений SUMMARY_RANK_LIMIT
+    reader_id = plan_session.query(ReaderLoanStats.reader_id)\
+        .filter(ReaderLoanStats.total_loans > 0)\
+        .order_by(order, ReaderLoanStats.reader_id)\
+        .first().reader_id
+
+    assert_no_seq_scans(plan_session, lambda: queries.get_reader_summary(plan_session, reader_id))
+
+
+def test_borrow_and_return_use_indexes(plan_session):
+    copy = plan_session.query(BookCopy).filter(BookCopy.status == CopyStatus.available).order_by(BookCopy.id).first()
+    reader_id = plan_session.query(Reader.id).order_by(Reader.id).first().id
+
+    assert_no_seq_scans(plan_session, lambda: services.borrow_any_copy(plan_session, copy.book_id, reader_id))
+    assert_no_seq_scans(plan_session, lambda: services.return_book(plan_session, copy.id))
+
+
+def test_delete_reader_uses_reader_index(plan_session):
+    reader_id = plan_session.query(ReaderLoanStats.reader_id)\
+        .order_by(ReaderLoanStats.total_loans.desc(), ReaderLoanStats.reader_id)\
+        .first().reader_id
+
+    assert_no_seq_scans(plan_session, lambda: services.delete_reader(plan_session, reader_id))
+    assert plan_session.query(Loan).filter(Loan.reader_id == reader_id).count() == 0
@@ -0,0 +1,149 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src import database, main, services
+from src.cache import TTLCache
+from src.database import Base, ReplicaRouter, SessionLocal
+from src.models import Book, BookCopy, CopyStatus, Genre, GenreLoanStats, Loan, Reader, ReaderLoanStats
+
+UNREACHABLE_DB = "postgresql://postgres:x@127.0.0.1:1/library_db"
+REPLICA_TEST_DB = "library_replica_test"
+
+
+class LaggingRouter(ReplicaRouter):
+    def __init__(self, lag: float, **kwargs):
+        super().__init__(None, **kwargs)
+        self.lag = lag
+        self.checks = 0
+
+    def lag_seconds(self):
+        self.checks += 1
+        return self.lag
+
+
+def test_primary_used_as_replica_has_no_lag(engine):
+    router = ReplicaRouter(engine, max_lag=5)
+
+    assert router.use_replica()
+    assert router.last_lag == 0
+
+
+def test_unreachable_replica_falls_back_to_primary():
+    router = ReplicaRouter(create_engine(UNREACHABLE_DB, connect_args={"connect_timeout": 1}))
+
+    assert not router.use_replica()
+    assert router.status()["fallbacks"] == 1
+
+
+def test_stale_replica_is_skipped_until_next_check():
+    router = LaggingRouter(lag=120, max_lag=30, check_interval=60)
+
+    assert not router.use_replica()
+    router.lag = 0
+    assert not router.use_replica()
+    assert router.checks == 1
+
+    router.check_interval = 0
+    assert router.use_replica()
+    assert router.checks == 2
+
+
+def test_replica_results_cached_only_after_it_caught_up():
+    router = LaggingRouter(lag=3, max_lag=30, check_interval=5)
+
+    assert router.caught_up_with(None)
+    assert not router.caught_up_with(1)
+    assert router.use_replica()
+    assert not router.caught_up_with(7)
+    assert router.caught_up_with(9)
+    assert router.status()["uncached_reads"] == 2
+
+
+def test_read_sessions_go_to_fresh_replica(engine, monkeypatch):
+    replica_sessions = sessionmaker(bind=engine)
+    router = LaggingRouter(lag=0, max_lag=30, check_interval=0)
+    monkeypatch.setattr(database, "replica_router", router)
+    monkeypatch.setattr(database, "ReplicaSessionLocal", replica_sessions)
+
+    assert database.read_sessionmaker() is replica_sessions
+
+    router.lag = 300
+    assert database.read_sessionmaker() is database.SessionLocal
+
+
+@pytest.fixture(scope="module")
+def replica_db(engine):
+    """Окрема база з тією ж схемою, але іншими даними — «репліка» для перевірки маршрутизації."""
+    admin = engine.execution_options(isolation_level="AUTOCOMMIT")
+    with admin.connect() as connection:
+        connection.execute(text(f"DROP DATABASE IF EXISTS {REPLICA_TEST_DB}"))
+        connection.execute(text(f"CREATE DATABASE {REPLICA_TEST_DB}"))
+
+    replica = create_engine(engine.url.set(database=REPLICA_TEST_DB))
+    Base.metadata.create_all(replica)
+    with sessionmaker(bind=replica)() as session:
+        genre = Genre(name="Replica Genre")
+        reader = Reader(first_name="Replica", last_name="Reader", email="replica@test.com")
+        session.add_all([genre, reader])
+        session.flush()
+        session.add_all([GenreLoanStats(genre_id=genre.id, total_loans=1000),
+                         ReaderLoanStats(reader_id=reader.id, total_loans=1000)])
+        session.commit()
+
+    yield replica
+    replica.dispose()
+    with admin.connect() as connection:
+        connection.execute(text(f"DROP DATABASE {REPLICA_TEST_DB}"))
+
+
+def test_analytics_stay_on_replica_under_continuous_writes(replica_db, monkeypatch):
+    router = ReplicaRouter(replica_db, max_lag=30, check_interval=0)
+    monkeypatch.setattr(router, "lag_seconds", lambda: 5.0)
+    cache = TTLCache()
+    monkeypatch.setattr(database, "ReplicaSessionLocal", sessionmaker(bind=replica_db))
+    monkeypatch.setattr(database, "replica_router", router)
+    monkeypatch.setattr(main, "replica_router", router)
+    for module in (main, services):
+        monkeypatch.setattr(module, "analytics_cache", cache)
+    client = TestClient(main.app)
+
+    # Без записів аналітика читає з «репліки» і кешується
+    assert [r["name"] for r in client.get("/analytics/top-readers").json()] == ["Replica Reader"]
+    assert [g["genre"] for g in client.get("/analytics/genres").json()] == ["Replica Genre"]
+    assert cache.stats()["size"] == 2
+    assert client.get("/system/replica").json()["healthy"]
+
+    with SessionLocal() as session:
+        genre = Genre(name="Primary Route Genre")
+        book = Book(title="Primary Route Book", publication_year=2024, genre=genre, isbn="PRR-1")
+        copy = BookCopy(inventory_number="PRR-INV-1", status=CopyStatus.available, book=book)
+        reader = Reader(first_name="Primary", last_name="Route", email="primary-route@test.com")
+        session.add_all([genre, book, copy, reader])
+        session.commit()
+        ids = {"genre": genre.id, "book": book.id, "copy": copy.id, "reader": reader.id}
+
+    try:
+        for _ in range(3):
+            response = client.post("/loans/borrow", params={"book_copy_id": ids["copy"], "reader_id": ids["reader"]})
+            assert response.status_code == 200
+            with SessionLocal() as session:
+                assert session.get(Loan, response.json()["loan_id"]) is not None
+            with sessionmaker(bind=replica_db)() as session:
+                assert session.query(Loan).count() == 0
+
+            # Записи йдуть безперервно, а аналітика все одно читає з «репліки», лише не кешує її результат
+            assert [g["genre"] for g in client.get("/analytics/genres").json()] == ["Replica Genre"]
+            assert cache.stats()["size"] == 0
+
+            assert client.post("/loans/return", params={"book_copy_id": ids["copy"]}).status_code == 200
+
+        status = client.get("/system/replica").json()
+        assert status["fallbacks"] == 0 and status["uncached_reads"] >= 3
+    finally:
+        with SessionLocal() as session:
+            services.delete_reader(session, ids["reader"])
+            session.query(Book).filter(Book.id == ids["book"]).delete()
+            session.query(Genre).filter(Genre.id == ids["genre"]).delete()
+            session.commit()
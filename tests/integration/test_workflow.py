@@ -1,27 +1,10 @@
 import pytest
-from sqlalchemy import create_engine, func, desc
-from sqlalchemy.orm import sessionmaker
-from src.database import DATABASE_URL
+from sqlalchemy import func, desc
 from src.models import BookCopy, Reader, CopyStatus, Loan, Book, Genre, Author
-from src.services import create_loan, return_book, delete_reader, report_lost_book
-import os
-
-
-@pytest.fixture(scope="module")
-def engine():
-    return create_engine(os.getenv("DATABASE_URL", DATABASE_URL))
-
-@pytest.fixture(scope="function")
-def db_session(engine):
-    connection = engine.connect()
-    transaction = connection.begin()
-    Session = sessionmaker(bind=connection)
-    session = Session()
-    yield session
-    session.close()   
-    if transaction.is_active:
-        transaction.rollback() 
-    connection.close()
+from src.services import (
+    create_loan, return_book, delete_reader, report_lost_book, bulk_create_loans, bulk_return_books, bulk_delete_readers
+)
+
 
 def create_test_data(session):
     genre = Genre(name="Integration Genre")
@@ -113,6 +96,22 @@ def test_hard_delete_reader(db_session):
     
     assert deleted_reader is None
 
+def test_bulk_delete_readers(db_session):
+    copy, reader = create_test_data(db_session)
+    other = Reader(first_name="Other", last_name="Integration", email="other-int@test.com")
+    db_session.add(other)
+    db_session.commit()
+    create_loan(db_session, copy.id, reader.id)
+    reader_id, other_id = reader.id, other.id
+
+    results = bulk_delete_readers(db_session, [reader_id, other_id, reader_id, -1])
+
+    assert [(r["reader_id"], r["ok"]) for r in results] == [(reader_id, True), (other_id, True), (-1, False)]
+    assert results[0]["loans_deleted"] == 1
+    assert results[1]["loans_deleted"] == 0
+    assert db_session.query(Reader).filter(Reader.id.in_([reader_id, other_id])).count() == 0
+    assert db_session.query(Loan).filter(Loan.book_copy_id == copy.id).count() == 0
+
 def test_window_function_ranking(db_session):
 
     genre = Genre(name="Rank Genre")
@@ -151,4 +150,33 @@ def test_window_function_ranking(db_session):
     assert top_stat.rank < low_stat.rank 
     
     assert top_stat.total == 2
-    assert low_stat.total == 1
\ No newline at end of file
+    assert low_stat.total == 1
+
+@pytest.mark.parametrize("copies_count", [2, 40])
+def test_bulk_borrow_and_return(db_session, count_queries, copies_count):
+    genre = Genre(name="Bulk Genre")
+    book = Book(title="Bulk Book", publication_year=2024, genre=genre, isbn="BLK-1")
+    copies = [BookCopy(inventory_number=f"BLK-{i}", status=CopyStatus.available, book=book) for i in range(copies_count)]
+    lost = BookCopy(inventory_number="BLK-LOST", status=CopyStatus.lost, book=book)
+    reader = Reader(first_name="Bulk", last_name="Reader", email="bulk@test.com")
+    db_session.add_all([genre, book, *copies, lost, reader])
+    db_session.commit()
+
+    requested = [c.id for c in copies] + [lost.id, -1]
+    reader_id = reader.id
+
+    with count_queries() as counter:
+        results = bulk_create_loans(db_session, requested, reader_id)
+    assert counter.count == 2
+
+    assert [r["ok"] for r in results] == [True] * copies_count + [False, False]
+    assert "lost" in results[-2]["error"]
+
+    with count_queries() as counter:
+        returned = bulk_return_books(db_session, requested)
+    assert counter.count == 1
+
+    assert sum(r["ok"] for r in returned) == copies_count
+    db_session.expire_all()
+    assert all(c.status == CopyStatus.available for c in copies)
+    assert all(loan.returned_at is not None for c in copies for loan in c.loans)
@@ -0,0 +1,25 @@
+from benchmarks.runner import Thresholds, compare
+
+
+def results(median_ms, statements):
+    return {"datasets": {"small": {"queries.get_top_readers": {"median_ms": median_ms, "statements": statements}}}}
+
+
+def test_compare_flags_extra_statements():
+    regressions = compare(results(10.0, 3), results(10.0, 1), Thresholds())
+
+    assert [(r.case, r.metric) for r in regressions] == [("queries.get_top_readers", "statements")]
+
+
+def test_compare_flags_slowdown_beyond_threshold():
+    regressions = compare(results(20.0, 1), results(10.0, 1), Thresholds(max_slowdown=0.5))
+
+    assert [r.metric for r in regressions] == ["median_ms"]
+
+
+def test_compare_ignores_noise_and_unknown_cases():
+    thresholds = Thresholds(max_slowdown=0.25, min_delta_ms=2.0)
+
+    assert compare(results(1.5, 1), results(0.5, 1), thresholds) == []
+    assert compare(results(12.0, 1), results(10.0, 1), thresholds) == []
+    assert compare(results(50.0, 5), {"datasets": {}}, thresholds) == []
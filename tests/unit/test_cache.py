@@ -0,0 +1,61 @@
+from src.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    assert cache.get("a") == (True, 1)
+    clock.now = 6
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidation_drops_results_computed_before_it():
+    cache = TTLCache(maxsize=10, ttl=60)
+
+    def stale_factory():
+        cache.clear()
+        return "stale"
+
+    assert cache.get_or_set("k", stale_factory) == "stale"
+    assert cache.get("k") == (False, None)
+
+
+def test_get_or_set_without_store_leaves_cache_empty():
+    cache = TTLCache(maxsize=10, ttl=60)
+
+    assert cache.get_or_set("k", lambda: "fresh", store=False) == "fresh"
+    assert cache.get("k") == (False, None)
+
+
+def test_since_clear_tracks_last_invalidation():
+    clock = FakeClock()
+    cache = TTLCache(ttl=5, clock=clock)
+    assert cache.since_clear() is None
+
+    clock.now = 10
+    cache.clear()
+    clock.now = 12
+    assert cache.since_clear() == 2
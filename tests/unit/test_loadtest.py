@@ -0,0 +1,31 @@
+from benchmarks.loadtest import histogram, percentile, pool_wait_delta, summarize
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+
+def test_histogram_buckets_and_summary():
+    buckets = histogram([0.5, 1.0, 1.5, 7000])
+
+    assert buckets["<=1ms"] == 2
+    assert buckets["<=2ms"] == 1
+    assert buckets[">5000ms"] == 1
+
+    summary = summarize([3.0, 1.0, 2.0], errors=1, elapsed=2.0)
+    assert summary["rps"] == 1.5
+    assert summary["p50_ms"] == 2.0
+    assert summary["max_ms"] == 3.0
+
+
+def test_pool_wait_delta():
+    before = {"sync": {"checkouts": 10, "timeouts": 0, "wait_total_ms": 5.0, "wait_max_ms": 1.0}}
+    after = {"sync": {"checkouts": 30, "timeouts": 1, "wait_total_ms": 45.0, "wait_max_ms": 9.0}}
+
+    assert pool_wait_delta(before, after)["sync"] == {
+        "checkouts": 20, "timeouts": 1, "wait_total_ms": 40.0, "wait_avg_ms": 2.0, "wait_max_ms": 9.0,
+    }
@@ -0,0 +1,33 @@
+import logging
+from src.logging_config import StructuredFormatter, timed
+
+
+def test_structured_formatter_appends_extra_fields():
+    record = logging.makeLogRecord({
+        "msg": "Копію #%s видано",
+        "args": (5,),
+        "levelname": "INFO",
+        "operation": "create_loan",
+        "loan_id": 42,
+    })
+
+    line = StructuredFormatter("%(levelname)s %(message)s").format(record)
+
+    assert line == "INFO Копію #5 видано operation=create_loan loan_id=42"
+
+
+def test_timed_skips_measurement_above_debug(caplog):
+    logger = logging.getLogger("src.test_timed")
+
+    @timed(logger)
+    def work():
+        return "done"
+
+    with caplog.at_level(logging.WARNING, logger="src.test_timed"):
+        assert work() == "done"
+    assert not caplog.records
+
+    with caplog.at_level(logging.DEBUG, logger="src.test_timed"):
+        work()
+    assert caplog.records[0].operation == "work"
+    assert caplog.records[0].duration_ms >= 0
@@ -0,0 +1,49 @@
+"""Холодний старт: імпорт застосунку і модулів для CLI у свіжому інтерпретаторі.
+
+БД навмисно недоступна — старт не повинен відкривати з'єднань.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Бюджети часу імпорту, с (вимірюються всередині процесу, без старту інтерпретатора)
+APP_IMPORT_BUDGET = 2.0
+CLI_IMPORT_BUDGET = 1.5
+
+UNREACHABLE_DB = "postgresql://postgres:x@127.0.0.1:1/library_db"
+
+
+def run_cold(code: str):
+    env = {**os.environ, "DATABASE_URL": UNREACHABLE_DB, "DB_ASYNC": "false", "DB_CREATE_ALL": "false"}
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def import_seconds(modules: str):
+    code = f"import time; started = time.perf_counter(); import {modules}; print(time.perf_counter() - started)"
+    return float(run_cold(code))
+
+
+@pytest.mark.parametrize("modules, budget", [
+    ("src.main", APP_IMPORT_BUDGET),
+    ("src.queries, src.services", CLI_IMPORT_BUDGET),
+])
+def test_cold_import_fits_budget_without_database(modules, budget):
+    assert import_seconds(modules) < budget
+
+
+def test_app_serves_while_database_is_unreachable():
+    output = run_cold(
+        "from fastapi.testclient import TestClient\n"
+        "from src.main import app\n"
+        "with TestClient(app) as client:\n"
+        "    print(client.get('/analytics/cache').status_code)\n"
+    )
+    assert output.strip() == "200"